@@ -0,0 +1,125 @@
+import math
+import multiprocessing
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from n2_puzzle.cache import PlanCache
+from n2_puzzle.puzzle import Direction, NPuzzle
+from n2_puzzle.scramble import is_solvable
+from n2_puzzle.solver import SolveStats, solve_puzzle
+from n2_puzzle.utils import TimeLimitExceeded, time_limit
+
+
+@dataclass
+class SolveResult:
+    """Outcome of solving one board of a batch"""
+
+    index: int
+    plan: List[Direction] = field(default_factory=list)
+    time: float = 0.0
+    error: Optional[str] = None
+    stats: Optional[SolveStats] = None
+
+    @property
+    def length(self) -> int:
+        return len(self.plan)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "index": self.index,
+            "plan": [action.name for action in self.plan],
+            "length": self.length,
+            "time": self.time,
+            "error": self.error,
+        }
+        if self.stats is not None:
+            result["stats"] = self.stats.to_dict()
+        return result
+
+
+def parse_board(line: str) -> List[List[int]]:
+    """Parse a board written row by row in a single line.
+
+    Tiles are separated by spaces or commas and the blank is 0, for
+    example `1 2 3 4 5 6 7 0 8`. The board size is inferred from the
+    number of tiles. Boards that can't reach the goal are rejected.
+    """
+    tiles = [int(tile) for tile in line.replace(",", " ").split()]
+    n = math.isqrt(len(tiles))
+    if n < 3 or n * n != len(tiles):
+        raise ValueError(f"Expected n * n tiles with n >= 3, got {len(tiles)}")
+    if sorted(tiles) != list(range(n * n)):
+        raise ValueError(f"Tiles must be the numbers from 0 to {n * n - 1}")
+    board = [tiles[i * n : (i + 1) * n] for i in range(n)]
+    if not is_solvable(board):
+        raise ValueError("The board can't be solved")
+    return board
+
+
+def read_boards(stream: TextIO) -> Iterator[List[List[int]]]:
+    """Read one board per line, skipping empty lines"""
+    for lineno, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield parse_board(line)
+        except ValueError as e:
+            raise ValueError(f"Line {lineno}: {e}") from e
+
+
+def solve_board(
+    task: Tuple[int, List[List[int]], Optional[float], bool, Dict[str, Any]],
+) -> SolveResult:
+    """Solve a single board of a batch.
+
+    The timeout relies on `SIGALRM`, so it is only enforced on
+    platforms that have it. The `cache_path` option is replaced by the
+    `PlanCache` of that database, which every worker opens once.
+    """
+    index, board, timeout, with_stats, options = task
+    if "cache_path" in options:
+        options = dict(options)
+        options["cache"] = PlanCache.open(options.pop("cache_path"))
+    start = time.perf_counter()
+    try:
+        stats = SolveStats() if with_stats else None
+        with time_limit(timeout):
+            plan = solve_puzzle(NPuzzle(board), stats=stats, **options)
+        return SolveResult(index, plan, time.perf_counter() - start, stats=stats)
+    except TimeLimitExceeded:
+        return SolveResult(index, time=time.perf_counter() - start, error="timeout")
+    except Exception as e:
+        return SolveResult(index, time=time.perf_counter() - start, error=repr(e))
+
+
+def solve_batch(
+    boards: Iterable[List[List[int]]],
+    processes: Optional[int] = None,
+    chunksize: int = 1,
+    timeout: Optional[float] = None,
+    ordered: bool = True,
+    stats: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+) -> Iterator[SolveResult]:
+    """Solve many boards with a pool of worker processes.
+
+    Boards are sent to the workers in chunks of `chunksize` boards and
+    the results are yielded as they arrive, in the order of `boards`
+    if `ordered` is True or as soon as they are completed otherwise.
+    A board that takes more than `timeout` seconds is abandoned and
+    its result carries the error `"timeout"`. With `stats`, every
+    result carries the `SolveStats` of its solve. `options` are passed
+    to `solve_puzzle` as keyword arguments, for example to set the
+    `endgame` size, and `cache_path` shares a `PlanCache` database
+    between the workers.
+    """
+    options = options or {}
+    tasks = (
+        (index, board, timeout, stats, options) for index, board in enumerate(boards)
+    )
+    with multiprocessing.Pool(processes) as pool:
+        if ordered:
+            yield from pool.imap(solve_board, tasks, chunksize)
+        else:
+            yield from pool.imap_unordered(solve_board, tasks, chunksize)
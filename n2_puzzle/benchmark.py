@@ -0,0 +1,246 @@
+import platform
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from n2_puzzle.parallel import hda_star
+from n2_puzzle.peephole import WINDOW, optimize_plan, shortcut_table
+from n2_puzzle.puzzle import Direction, NPuzzle, generate_template_board
+from n2_puzzle.scramble import random_boards, random_walk_boards
+from n2_puzzle.search import PackedState, SearchStats, a_star_puzzle
+from n2_puzzle.solver import endgame_board, greedy_phases, solve_endgame, solve_puzzle
+from n2_puzzle.utils import TimeLimitExceeded, time_limit
+
+PHASES = ("process_row", "process_column", "endgame_a_star", "endgame", "peephole")
+
+# Timings below this many seconds are too noisy to be compared
+MIN_TIME = 0.001
+
+
+def scramble(n: int, seed: int, steps: Optional[int] = None) -> List[List[int]]:
+    """Seeded random walk of the blank tile starting from the goal.
+
+    The walk has `steps` moves, 50 * n * n by default, so the board is
+    always solvable and the same seed gives the same board.
+    """
+    rng = random.Random(seed)
+    puzzle = NPuzzle(generate_template_board(n, is_goal=True))
+    directions = list(Direction)
+    for _ in range(steps if steps is not None else 50 * n * n):
+        puzzle.move(rng.choice(directions))
+    return puzzle.board
+
+
+def benchmark_cases(max_n: int, seeds: int) -> Iterator[Tuple[str, List[List[int]]]]:
+    """Boards of the benchmark: the worst case and `seeds` scrambles per n"""
+    for n in range(3, max_n + 1):
+        yield f"n={n} worst", generate_template_board(n)
+        for seed in range(seeds):
+            yield f"n={n} seed={seed}", scramble(n, seed)
+
+
+def run_case(board: List[List[int]], timeout: Optional[float]) -> Dict[str, Any]:
+    """Solve a board once measuring every phase.
+
+    The greedy phases, the endgame table walk and the peephole pass are
+    the ones used by `solve_puzzle`. The endgame is also solved with
+    `a_star_puzzle`, on the same sub-board, to track the cost of the
+    search engine.
+    """
+    timings = dict.fromkeys(PHASES, 0.0)
+    puzzle = NPuzzle([list(row) for row in board])
+    blank = puzzle.positions[0]
+    moves: List[Direction] = []
+    stats = SearchStats()
+    goal = bytes(tile for row in generate_template_board(3, True) for tile in row)
+    with time_limit(timeout):
+        start = time.perf_counter()
+        for phase in greedy_phases(puzzle, moves):
+            now = time.perf_counter()
+            timings[phase] += now - start
+            start = now
+        sub_board = endgame_board(puzzle)
+        a_star_puzzle(
+            PackedState(sub_board, 3, sub_board.index(0)),
+            PackedState(goal, 3, goal.index(0)),
+            stats=stats,
+            buckets=True,
+        )
+        now = time.perf_counter()
+        timings["endgame_a_star"] = now - start
+        solve_endgame(puzzle, moves)
+        start = time.perf_counter()
+        timings["endgame"] = start - now
+        moves = optimize_plan(moves, puzzle.n, blank)
+        timings["peephole"] = time.perf_counter() - start
+    return {
+        "plan_length": len(moves),
+        "time": timings,
+        "nodes_expanded": stats.expanded,
+        "max_open": stats.max_open,
+    }
+
+
+def peak_memory(board: List[List[int]], timeout: Optional[float]) -> int:
+    """Peak memory in bytes allocated by `solve_puzzle` on the board"""
+    tracemalloc.start()
+    try:
+        with time_limit(timeout):
+            solve_puzzle(NPuzzle([list(row) for row in board]))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(
+    max_n: int = 8, seeds: int = 5, repeat: int = 3, timeout: Optional[float] = 10
+) -> Dict[str, Any]:
+    """Run every benchmark case.
+
+    Each case is run `repeat` times and the fastest time of every phase
+    is kept. Cases that fail or take longer than `timeout` seconds
+    record the error instead of the measures.
+    """
+    shortcut_table(WINDOW)
+    cases: Dict[str, Any] = {}
+    for name, board in benchmark_cases(max_n, seeds):
+        try:
+            result = run_case(board, timeout)
+            for _ in range(repeat - 1):
+                timings = run_case(board, timeout)["time"]
+                for phase in PHASES:
+                    result["time"][phase] = min(result["time"][phase], timings[phase])
+            result["total_time"] = sum(result["time"].values())
+            result["peak_memory"] = peak_memory(board, timeout)
+            result["error"] = None
+        except TimeLimitExceeded:
+            result = {"error": "timeout"}
+        except Exception as e:
+            result = {"error": repr(e)}
+        cases[name] = result
+    return {"python": platform.python_version(), "cases": cases}
+
+
+def scaling_report(
+    sizes: Iterable[int] = (10, 20, 40, 60, 80, 100), seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Time `solve_puzzle` on a random board of every size.
+
+    The time per move of the plan should stay flat as n grows, showing
+    that the solve time grows with the plan length and not faster.
+    """
+    # Built once per process, it shouldn't count in the first solve
+    shortcut_table(WINDOW)
+    report = []
+    for n in sizes:
+        puzzle = NPuzzle(next(random_boards(n, 1, seed)))
+        start = time.perf_counter()
+        plan = solve_puzzle(puzzle)
+        elapsed = time.perf_counter() - start
+        report.append(
+            {
+                "n": n,
+                "plan_length": len(plan),
+                "time": elapsed,
+                "time_per_move": elapsed / max(len(plan), 1),
+            }
+        )
+    return report
+
+
+def parallel_report(
+    workers: Iterable[int] = (1, 2, 4, 8), depth: int = 150, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Time `hda_star` on a 4x4 board with more and more workers.
+
+    The board is a random walk of `depth` moves from the goal. The
+    speedup of every run is measured against `a_star_puzzle` on the
+    same board, and the plans are checked to have the same length.
+    """
+    board = next(random_walk_boards(4, depth, 1, seed))
+    init = bytes(tile for row in board for tile in row)
+    goal = bytes(tile for row in generate_template_board(4, True) for tile in row)
+
+    def states() -> Tuple[PackedState, PackedState]:
+        return PackedState(init, 4, init.index(0)), PackedState(goal, 4, goal.index(0))
+
+    stats = SearchStats()
+    start = time.perf_counter()
+    optimal = len(a_star_puzzle(*states(), stats=stats, buckets=True))
+    baseline = time.perf_counter() - start
+    report = [
+        {
+            "workers": 0,
+            "plan_length": optimal,
+            "time": baseline,
+            "speedup": 1.0,
+            "nodes_expanded": stats.expanded,
+        }
+    ]
+    for count in workers:
+        stats = SearchStats()
+        start = time.perf_counter()
+        plan = hda_star(*states(), stats=stats, workers=count)
+        elapsed = time.perf_counter() - start
+        if len(plan) != optimal:
+            raise AssertionError(f"hda_star found {len(plan)} moves, not {optimal}")
+        report.append(
+            {
+                "workers": count,
+                "plan_length": len(plan),
+                "time": elapsed,
+                "speedup": baseline / elapsed,
+                "nodes_expanded": stats.expanded,
+            }
+        )
+    return report
+
+
+def _slower(baseline: float, current: float, tolerance: float) -> bool:
+    return current > baseline * (1 + tolerance) and current - baseline > MIN_TIME
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.25
+) -> List[str]:
+    """List the regressions of `current` with respect to `baseline`.
+
+    Plan lengths, expanded nodes and open list sizes are deterministic,
+    so any increase is a regression. Times and peak memory are flagged
+    when they grow more than `tolerance` (relative) with respect to the
+    baseline.
+    """
+    regressions = []
+    for name, before in baseline["cases"].items():
+        after = current["cases"].get(name)
+        if after is None:
+            continue
+        if after["error"] is not None:
+            if before["error"] is None:
+                regressions.append(f"{name}: {after['error']}")
+            continue
+        if before["error"] is not None:
+            continue
+        for key in ("plan_length", "nodes_expanded", "max_open"):
+            if key in before and after[key] > before[key]:
+                regressions.append(f"{name}: {key} {before[key]} -> {after[key]}")
+        for phase in PHASES:
+            if phase not in before["time"]:
+                continue
+            if _slower(before["time"][phase], after["time"][phase], tolerance):
+                regressions.append(
+                    f"{name}: {phase} time "
+                    f"{before['time'][phase]:.4f}s -> {after['time'][phase]:.4f}s"
+                )
+        if _slower(before["total_time"], after["total_time"], tolerance):
+            regressions.append(
+                f"{name}: total time "
+                f"{before['total_time']:.4f}s -> {after['total_time']:.4f}s"
+            )
+        if after["peak_memory"] > before["peak_memory"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak memory "
+                f"{before['peak_memory']} -> {after['peak_memory']} bytes"
+            )
+    return regressions
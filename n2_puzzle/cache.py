@@ -0,0 +1,259 @@
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from n2_puzzle.puzzle import Direction, array_typecode
+from n2_puzzle.symmetry import canonical_board, is_standard_goal, transpose_plan
+from n2_puzzle.utils import data_dir
+
+# Every move takes 2 bits of an encoded plan
+MOVES = tuple(Direction)
+
+
+def encode_board(tiles: Sequence[int]) -> bytes:
+    """Compact encoding of a board given as its tiles row by row.
+
+    Tiles take one byte each on boards of up to 256 cells, and the
+    bytes of the smallest array type that holds them otherwise, in
+    little-endian order, so the encoding is the same on every platform.
+    """
+    if len(tiles) <= 256:
+        return bytes(tiles)
+    cells = array(array_typecode(len(tiles)), tiles)
+    if sys.byteorder == "big":
+        cells.byteswap()
+    return cells.tobytes()
+
+
+def plan_key(tag: str, board: Sequence[int], goal: Sequence[int]) -> bytes:
+    """Key of the plan from `board` to `goal` in a `PlanCache`.
+
+    `tag` names the solver and the options that produced the plan, so
+    plans of different solvers are cached apart. The key is a 20 bytes
+    digest of the tag and the encoded boards, whatever the board size.
+    """
+    digest = hashlib.blake2b(tag.encode(), digest_size=20)
+    digest.update(struct.pack("<I", len(board)))
+    digest.update(encode_board(board))
+    digest.update(encode_board(goal))
+    return digest.digest()
+
+
+def encode_plan(plan: List[Direction]) -> bytes:
+    """Pack a plan in 2 bits per move after its length"""
+    packed = bytearray((len(plan) + 3) // 4)
+    for i, action in enumerate(plan):
+        packed[i >> 2] |= action.value << ((i & 3) << 1)
+    return struct.pack("<I", len(plan)) + bytes(packed)
+
+
+def decode_plan(data: bytes) -> List[Direction]:
+    (length,) = struct.unpack_from("<I", data)
+    packed = data[4:]
+    return [MOVES[(packed[i >> 2] >> ((i & 3) << 1)) & 3] for i in range(length)]
+
+
+def plan_cache_path() -> str:
+    return os.path.join(data_dir(), "plans.sqlite")
+
+
+@dataclass
+class CacheStats:
+    """Lookups and writes of a `PlanCache`.
+
+    Every lookup is either a hit, found in memory or on disk, or a
+    miss. `evictions` counts the entries dropped from both levels to
+    keep them within their size.
+    """
+
+    hits: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class PlanCache:
+    """Two-level cache of solved plans.
+
+    Plans are kept in an in-memory LRU of at most `max_entries` plans
+    and, if `path` is given, in an SQLite database of at most
+    `max_disk_entries` plans, which evicts the least recently used
+    ones as well. Plans found on disk are promoted to memory. Entries
+    are keyed by `plan_key` and the plans stored with `encode_plan`.
+
+    Plans to the goal of `generate_template_board` are stored for the
+    `canonical_board` of their board only, so a board and its
+    transpose share the same entry.
+
+    A cache can be sent to other processes, which open their own
+    connection to the database and start with an empty memory level.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 1024,
+        max_disk_entries: int = 100_000,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.stats = CacheStats()
+        self.memory: "OrderedDict[bytes, List[Direction]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._tick = 0
+        self._rows = 0
+        if path is not None:
+            self._db = self._connect(path)
+
+    @classmethod
+    def open(cls, path: str) -> "PlanCache":
+        """Cache of the database at `path`, opened once per process"""
+        if path not in _caches:
+            _caches[path] = cls(path)
+        return _caches[path]
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS plans"
+            " (key BLOB PRIMARY KEY, plan BLOB NOT NULL, used INTEGER NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS plans_used ON plans (used)")
+        self._tick, self._rows = db.execute(
+            "SELECT COALESCE(MAX(used), 0), COUNT(*) FROM plans"
+        ).fetchone()
+        return db
+
+    def __getstate__(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "max_disk_entries": self.max_disk_entries,
+        }
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__init__(**state)  # type: ignore
+
+    def _key(
+        self, tag: str, board: Sequence[int], goal: Sequence[int]
+    ) -> Tuple[bytes, bool]:
+        """Key of the entry of a plan, and whether the plan is transposed"""
+        transposed = False
+        if is_standard_goal(goal):
+            n = math.isqrt(len(board))
+            board, transposed = canonical_board(list(board), n)
+        return plan_key(tag, board, goal), transposed
+
+    def get(
+        self, tag: str, board: Sequence[int], goal: Sequence[int]
+    ) -> Optional[List[Direction]]:
+        """Cached plan from `board` to `goal`, None if there is none"""
+        key, transposed = self._key(tag, board, goal)
+        plan = self.memory.get(key)
+        if plan is not None:
+            self.memory.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            return transpose_plan(plan) if transposed else list(plan)
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT plan FROM plans WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._tick += 1
+                self._db.execute(
+                    "UPDATE plans SET used = ? WHERE key = ?", (self._tick, key)
+                )
+                plan = decode_plan(row[0])
+                self._remember(key, plan)
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                return transpose_plan(plan) if transposed else list(plan)
+        self.stats.misses += 1
+        return None
+
+    def put(
+        self,
+        tag: str,
+        board: Sequence[int],
+        goal: Sequence[int],
+        plan: List[Direction],
+    ) -> None:
+        """Store the plan from `board` to `goal` in both levels"""
+        key, transposed = self._key(tag, board, goal)
+        plan = transpose_plan(plan) if transposed else list(plan)
+        self._remember(key, plan)
+        self.stats.stores += 1
+        if self._db is None:
+            return
+        self._tick += 1
+        entry = (key, encode_plan(plan), self._tick)
+        if self._db.execute(
+            "INSERT OR IGNORE INTO plans VALUES (?, ?, ?)", entry
+        ).rowcount:
+            self._rows += 1
+        else:
+            self._db.execute(
+                "UPDATE plans SET plan = ?, used = ? WHERE key = ?",
+                entry[1:] + entry[:1],
+            )
+        # The rows are counted as they are written, and counted again
+        # when evicting, to take the writes of other processes into
+        # account. A tenth of the entries is evicted at once so that
+        # evictions stay rare.
+        if self._rows > self.max_disk_entries:
+            excess = self._rows - self.max_disk_entries + self.max_disk_entries // 10
+            self.stats.evictions += self._db.execute(
+                "DELETE FROM plans WHERE key IN"
+                " (SELECT key FROM plans ORDER BY used LIMIT ?)",
+                (excess,),
+            ).rowcount
+            (self._rows,) = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()
+
+    def _remember(self, key: bytes, plan: List[Direction]) -> None:
+        self.memory[key] = plan
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry of both levels"""
+        self.memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM plans")
+            self._rows = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        """Number of plans in the largest level"""
+        if self._db is None:
+            return len(self.memory)
+        (count,) = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()
+        return max(count, len(self.memory))
+
+    def __enter__(self) -> "PlanCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+_caches: Dict[str, PlanCache] = {}
@@ -0,0 +1,155 @@
+import mmap
+import os
+from collections import deque
+from typing import Dict, List, Optional, Union
+
+from n2_puzzle.puzzle import Direction, generate_template_board
+from n2_puzzle.search import SearchStats, blank_moves
+from n2_puzzle.symmetry import transpose_board
+from n2_puzzle.utils import data_dir
+
+MAGIC = b"N2END2"
+
+# Distance stored for the entries that can't be reached from the goal
+UNREACHABLE = 255
+
+# Number of orderings of the 8 tiles with an even number of inversions
+HALF = 20160
+
+# Block of the table of every position of the blank on or below the
+# diagonal, boards with the blank above it are looked up transposed
+BLOCKS = {pos: block for block, pos in enumerate((0, 3, 4, 6, 7, 8))}
+
+
+def rank(board: Union[bytes, bytearray]) -> int:
+    """Index of a 3x3 board in the endgame table.
+
+    The tiles are read row by row skipping the blank and ranked by their
+    Lehmer code. On a 3x3 board every reachable ordering has an even
+    number of inversions, and swapping the last two tiles only changes
+    the last bit of the rank and the parity, so halving the rank is
+    enough to index the reachable orderings. The position of the blank
+    selects one of the `BLOCKS` of `HALF` entries.
+
+    A board and its `transpose_board` are the same distance away from
+    the goal, so boards with the blank above the diagonal are ranked
+    as their transpose, and the table only has 6 blocks instead of 9.
+    """
+    blank = board.index(0)
+    if blank // 3 < blank % 3:
+        board = transpose_board(bytes(board), 3)
+        blank = board.index(0)
+    tiles = [tile for tile in board if tile]
+    index = 0
+    for i, tile in enumerate(tiles):
+        smaller = 0
+        for other in tiles[i + 1 :]:
+            if other < tile:
+                smaller += 1
+        index = index * (len(tiles) - i) + smaller
+    return BLOCKS[blank] * HALF + index // 2
+
+
+def build_endgame_table() -> bytearray:
+    """Distance to the goal of every 3x3 board.
+
+    Runs a BFS from the goal over the 181,440 reachable boards and
+    stores each distance at the index given by `rank`.
+    """
+    goal = bytes(tile for row in generate_template_board(3, True) for tile in row)
+    moves = blank_moves(3)
+    distances: Dict[bytes, int] = {goal: 0}
+    queue = deque([goal])
+    while queue:
+        board = queue.popleft()
+        distance = distances[board] + 1
+        blank = board.index(0)
+        for _, pos in moves[blank]:
+            child = bytearray(board)
+            child[blank] = child[pos]
+            child[pos] = 0
+            key = bytes(child)
+            if key not in distances:
+                distances[key] = distance
+                queue.append(key)
+
+    table = bytearray([UNREACHABLE]) * (len(BLOCKS) * HALF)
+    for board, distance in distances.items():
+        table[rank(board)] = distance
+    return table
+
+
+def endgame_table_path() -> str:
+    return os.path.join(data_dir(), "endgame-3-sym.bin")
+
+
+class EndgameTable:
+    """Exact distance table of the 3x3 puzzle memory-mapped from disk.
+
+    Solving a 3x3 board becomes a walk on the table: from every board
+    we move to the neighbor that is one move closer to the goal. The
+    goal is the one of `generate_template_board(3, is_goal=True)`.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an endgame table")
+        self.table = memoryview(self._mmap)[len(MAGIC) :]
+        if len(self.table) != len(BLOCKS) * HALF:
+            raise ValueError(f"{path} is truncated")
+
+    @classmethod
+    def load(cls) -> "EndgameTable":
+        """Load the endgame table, building and saving it the first time"""
+        global _table
+        if _table is None:
+            path = endgame_table_path()
+            if not os.path.exists(path):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(MAGIC)
+                    f.write(build_endgame_table())
+                os.replace(tmp_path, path)
+            _table = cls(path)
+        return _table
+
+    def distance(self, board: bytes) -> int:
+        """Number of moves of an optimal plan for a packed 3x3 board"""
+        distance = self.table[rank(board)]
+        if distance == UNREACHABLE:
+            raise ValueError("The board can't be solved")
+        return distance
+
+    def solve(
+        self, board: bytes, stats: Optional[SearchStats] = None
+    ) -> List[Direction]:
+        """Optimal plan for a packed 3x3 board.
+
+        If `stats` is given, every board of the plan counts as expanded
+        and every table lookup of its neighbors as generated.
+        """
+        counters = stats if stats is not None else SearchStats()
+        moves = blank_moves(3)
+        current = bytearray(board)
+        blank = current.index(0)
+        distance = self.distance(board)
+        plan: List[Direction] = []
+        while distance:
+            counters.expanded += 1
+            for dir, pos in moves[blank]:
+                counters.generated += 1
+                current[blank] = current[pos]
+                current[pos] = 0
+                if self.table[rank(current)] == distance - 1:
+                    plan.append(dir)
+                    blank = pos
+                    distance -= 1
+                    break
+                current[pos] = current[blank]
+                current[blank] = 0
+        return plan
+
+
+_table: Optional[EndgameTable] = None
@@ -1,448 +1,436 @@
-from n2_puzzle.puzzle import Direction, NPuzzle, animate_plan
-
-
-def invalid_action(
-    puzzle: NPuzzle, i: int, j: int, action: Direction, left_limit: int, up_limit: int
-):
-    """Check if for a given state of the puzzle, the action is valid or not
-
-    For example if the puzzle state is:
-
-    -----------------
-    |  1| 15| 13| 12|
-    -----------------
-    | 14|   |  9|  8|
-    -----------------
-    | 10| 11|  6|  4|
-    -----------------
-    |  7|  3|  5|  2|
-    -----------------
-
-    And left is set to 1, then the action if left. Then even though
-    the move is "legal", it won't be given this restriction.
-    """
-    n = puzzle.n
-    return (
-        action == Direction.LEFT
-        and j == left_limit
-        or action == Direction.RIGHT
-        and j == n - 1
-        or action == Direction.UP
-        and i == up_limit
-        or action == Direction.DOWN
-        and i == n - 1
-    )
-
-
-def move_diagonally_left(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Moves the target tile diagonally up left. It assumes that the
-    blank tile is on the right of the target tile
-    """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.UP,
-        Direction.LEFT,
-        Direction.DOWN,
-        Direction.LEFT,
-        Direction.UP,
-        Direction.RIGHT,
-    ]
-
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, left_limit, up_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_up_left(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Moves the target tile upwards right. It assumes that the
-    blank tile is on the right of the target tile
-    """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.UP,
-        Direction.LEFT,
-        Direction.DOWN,
-        Direction.RIGHT,
-        Direction.UP,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, left_limit, up_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_diagonally_right(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Moves the target tile diagonally up right. It assumes that the
-    blank tile is on the right of the target tile
-    """
-    i0, j0 = puzzle.tile_pos[0]
-    plan = [
-        Direction.LEFT,
-        Direction.UP,
-        Direction.RIGHT,
-        Direction.DOWN,
-        Direction.RIGHT,
-        Direction.UP,
-    ]
-
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, left_limit, up_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        i0, j0 = puzzle.tile_pos[0]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_up_right(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    This is used for the cases in which the target tile is
-    on the last column. It assumes the blank tile will be
-    on the left
-    """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.UP,
-        Direction.RIGHT,
-        Direction.DOWN,
-        Direction.LEFT,
-        Direction.UP,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, left_limit, up_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_blank_to_target(puzzle: NPuzzle, target_tile: int, it: int, jt: int):
-    """
-    Moves the blank tile so it is next to the target tile
-    """
-    # Corner case in which the target position is at the end
-    # and the target tile is as well at the end
-    # In this case the blank will be on the left of the target
-    i0, j0 = puzzle.tile_pos[0]
-    i, j = puzzle.tile_pos[target_tile]
-
-    if (i, j) == (it, jt):
-        return
-
-    if jt == puzzle.n - 1 and j == puzzle.n - 1:
-        if j0 == j:
-            action = Direction.LEFT
-            animate_plan(puzzle, [action])
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from n2_puzzle.puzzle import Direction, NPuzzle, apply_plan
+from n2_puzzle.symmetry import transpose_plan
+
+# Plan that completes a row when its second to last tile is already in
+# the last column, its last tile is trapped on the left of it, and the
+# blank is right below the last tile:
+#
+# -------------        -------------
+# |  1|  3|  2|        |  1|  2|  3|
+# -------------        -------------
+# |  x|   |  x|  --->  |  x|  x|  x|
+# -------------        -------------
+# |  x|  x|  x|        |  x|  x|   |
+# -------------        -------------
+#
+# Only the last three columns of the next two rows are used.
+TRAPPED_LAST_TILE = [
+    Direction.UP,
+    Direction.RIGHT,
+    Direction.DOWN,
+    Direction.DOWN,
+    Direction.LEFT,
+    Direction.UP,
+    Direction.RIGHT,
+    Direction.UP,
+    Direction.LEFT,
+    Direction.DOWN,
+    Direction.DOWN,
+    Direction.RIGHT,
+    Direction.UP,
+    Direction.LEFT,
+    Direction.UP,
+    Direction.RIGHT,
+    Direction.DOWN,
+]
+
+
+@lru_cache(maxsize=None)
+def step_directions(n: int) -> Dict[int, Direction]:
+    """Direction of the blank for each change of its flat position"""
+    return {
+        -n: Direction.UP,
+        n: Direction.DOWN,
+        -1: Direction.LEFT,
+        1: Direction.RIGHT,
+    }
+
+
+def locked_cells(n: int, rows: int, columns: int) -> bytearray:
+    """Mark the cells of the first `rows` rows and `columns` columns.
+
+    These are the cells of the rows and columns already solved, which
+    the blank must not go through anymore.
+    """
+    locked = bytearray(n * n)
+    for i in range(n):
+        if i < rows:
+            locked[i * n : (i + 1) * n] = b"\x01" * n
         else:
-            while j0 != j - 1:
-                action = Direction.RIGHT
-                animate_plan(puzzle, [action])
-                i0, j0 = puzzle.tile_pos[0]
-    else:
-        # In any other case we just move the blank
-        # right next to the target
-        while j0 != j + 1:
-            if j == puzzle.n - 1 and j0 == puzzle.n - 2:
-                break
-            actions = []
-            if j0 > j:
-                if i0 == it:
-                    actions.append(Direction.DOWN)
-
-                actions.append(Direction.LEFT)
-            else:
-                actions.append(Direction.RIGHT)
-            animate_plan(puzzle, actions)
-            i0, j0 = puzzle.tile_pos[0]
-            i, j = puzzle.tile_pos[target_tile]
-
-    # Move the blank tile to the same position of the
-    # target tile
-    while i0 != i:
-        if i0 > i:
-            animate_plan(puzzle, [Direction.UP])
+            locked[i * n : i * n + columns] = b"\x01" * columns
+    return locked
+
+
+def _waypoints(n: int, src: int, dst: int) -> Iterator[List[Tuple[int, int]]]:
+    """Corners of the candidate paths of the blank, shortest first"""
+    si, sj = divmod(src, n)
+    ti, tj = divmod(dst, n)
+    yield [(si, tj)]
+    yield [(ti, sj)]
+    for k in (si - 1, si + 1, ti - 1, ti + 1):
+        if 0 <= k < n:
+            yield [(k, sj), (k, tj)]
+    for k in (sj - 1, sj + 1, tj - 1, tj + 1):
+        if 0 <= k < n:
+            yield [(si, k), (ti, k)]
+    # Around the tile when it blocks the way out of a corner
+    for k in (si - 1, si + 1):
+        for m in (tj - 1, tj + 1):
+            if 0 <= k < n and 0 <= m < n:
+                yield [(k, sj), (k, m), (ti, m)]
+    for k in (sj - 1, sj + 1):
+        for m in (ti - 1, ti + 1):
+            if 0 <= k < n and 0 <= m < n:
+                yield [(si, k), (m, k), (m, tj)]
+
+
+def _walk(
+    n: int,
+    src: int,
+    dst: int,
+    waypoints: List[Tuple[int, int]],
+    locked: bytearray,
+    avoid: int,
+) -> Optional[List[int]]:
+    """Cells of the straight segments from `src` to `dst` through the
+    waypoints, or None if one of them is locked or is `avoid`"""
+    path = []
+    pos = src
+    for target in [i * n + j for i, j in waypoints] + [dst]:
+        if target // n == pos // n:
+            step = 1 if target > pos else -1
         else:
-            animate_plan(puzzle, [Direction.DOWN])
-        i0, j0 = puzzle.tile_pos[0]
-    if j == puzzle.n - 1 and j0 == puzzle.n - 2:
-        animate_plan(puzzle, [Direction.RIGHT])
-
-
-def has_to_move_right(puzzle: NPuzzle, j: int, jt: int) -> bool:
-    """
-    We move to right if target position is on the right side
-    of the j position
-    """
-    return j < jt or j == jt and jt == puzzle.n - 1
-
-
-def move_left_down_row(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
+            step = n if target > pos else -n
+        while pos != target:
+            pos += step
+            if locked[pos] or pos == avoid:
+                return None
+            path.append(pos)
+    return path
+
+
+def _search_path(
+    n: int, src: int, dst: int, locked: bytearray, avoid: int
+) -> List[int]:
+    """Shortest path of the blank found by a BFS over the free cells"""
+    parents = {src: src}
+    queue = deque([src])
+    while queue:
+        pos = queue.popleft()
+        if pos == dst:
+            path = []
+            while pos != src:
+                path.append(pos)
+                pos = parents[pos]
+            return path[::-1]
+        i, j = divmod(pos, n)
+        for nxt, valid in (
+            (pos - n, i > 0),
+            (pos + n, i < n - 1),
+            (pos - 1, j > 0),
+            (pos + 1, j < n - 1),
+        ):
+            if valid and nxt not in parents and not locked[nxt] and nxt != avoid:
+                parents[nxt] = pos
+                queue.append(nxt)
+    raise ValueError("The blank can't reach its target without breaking the board")
+
+
+def blank_path(n: int, src: int, dst: int, locked: bytearray, avoid: int) -> List[int]:
+    """Cells the blank goes through to reach `dst` from `src`.
+
+    The path never goes through locked cells or the cell `avoid`, which
+    holds the tile being placed. It is one of the two L-shaped shortest
+    paths or, when the tile is in the way of both, a detour through a
+    neighbor row or column. Only if none of them is free, which is rare,
+    the path is searched with a BFS.
+    """
+    for waypoints in _waypoints(n, src, dst):
+        path = _walk(n, src, dst, waypoints, locked, avoid)
+        if path is not None:
+            return path
+    return _search_path(n, src, dst, locked, avoid)
+
+
+def move_blank(
+    puzzle: NPuzzle, dst: int, locked: bytearray, avoid: int, moves: List[Direction]
 ) -> None:
-    """
-    This is used for the cases in which the target tile is
-    on the last column. It assumes the blank tile will be
-    on the left
-    """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.DOWN,
-        Direction.LEFT,
-        Direction.LEFT,
-        Direction.UP,
-        Direction.RIGHT,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, left_limit, up_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
+    """Move the blank to the flat position `dst` without touching `avoid`"""
+    directions = step_directions(puzzle.n)
+    cells, positions = puzzle.cells, puzzle.positions
+    blank = positions[0]
+    for pos in blank_path(puzzle.n, blank, dst, locked, avoid):
+        moves.append(directions[pos - blank])
+        tile = cells[pos]
+        cells[blank] = tile
+        positions[tile] = blank
+        blank = pos
+    cells[blank] = 0
+    positions[0] = blank
+
+
+# Side of the window of cells centered on a tile that holds every
+# candidate path of `blank_path` when the blank is next to the tile
+SIDE = 5
+CENTER = SIDE * SIDE // 2
+
+
+def step_window(n: int, locked: bytearray, pos: int) -> bytes:
+    """Locked cells of the window centered on `pos`, row by row.
+
+    Cells out of the board are locked, so the candidate paths that
+    leave the board are rejected as they are on the board.
+    """
+    i, j = divmod(pos, n)
+    half = SIDE // 2
+    if half <= i < n - half and half <= j < n - half:
+        start = pos - half * n - half
+        return b"".join(
+            locked[row : row + SIDE] for row in range(start, start + SIDE * n, n)
+        )
+    window = bytearray(b"\x01") * (SIDE * SIDE)
+    for wi in range(SIDE):
+        r = i - half + wi
+        if not 0 <= r < n:
+            continue
+        for wj in range(SIDE):
+            c = j - half + wj
+            if 0 <= c < n:
+                window[wi * SIDE + wj] = locked[r * n + c]
+    return bytes(window)
+
+
+@lru_cache(maxsize=None)
+def step_route(
+    n: int, src: int, dst: int, window: bytes
+) -> Optional[Tuple[Tuple[Direction, ...], Tuple[int, ...]]]:
+    """Moves of a step of the tile at the center of the window.
+
+    The blank goes from `src` to `dst`, positions in the window, and
+    then swaps with the tile, along the paths `move_blank` would take.
+    Returns the moves and the change of the flat position of the blank
+    on the board for each of them, or None if `blank_path` would need
+    its BFS. When the blank and `dst` are next to the tile, every
+    other candidate path of `blank_path` stays in the window, so the
+    route only depends on the key and is computed once.
+    """
+    locked = bytearray(window)
+    cells = None
+    for waypoints in _waypoints(SIDE, src, dst):
+        cells = _walk(SIDE, src, dst, waypoints, locked, CENTER)
+        if cells is not None:
             break
-
-
-def move_target_tile_to_row_left(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
+    swap = _walk(SIDE, dst, CENTER, [], locked, -1)
+    if cells is None or swap is None:
+        return None
+    directions = step_directions(n)
+    steps = []
+    blank = src
+    for cell in cells + swap:
+        di, dj = divmod(cell, SIDE)
+        bi, bj = divmod(blank, SIDE)
+        steps.append((di - bi) * n + dj - bj)
+        blank = cell
+    return tuple(directions[step] for step in steps), tuple(steps)
+
+
+def apply_steps(
+    puzzle: NPuzzle,
+    route: Tuple[Tuple[Direction, ...], Tuple[int, ...]],
+    moves: List[Direction],
 ) -> None:
+    """Apply a route of `step_route` without checking its moves"""
+    cells, positions = puzzle.cells, puzzle.positions
+    blank = positions[0]
+    for step in route[1]:
+        pos = blank + step
+        tile = cells[pos]
+        cells[blank] = tile
+        positions[tile] = blank
+        blank = pos
+    cells[blank] = 0
+    positions[0] = blank
+    moves.extend(route[0])
+
+
+def _cell(n: int, i: int, j: int, transposed: bool) -> int:
+    return j * n + i if transposed else i * n + j
+
+
+def tile_steps(
+    puzzle: NPuzzle,
+    tile: int,
+    i: int,
+    j: int,
+    locked: bytearray,
+    transposed: bool,
+    moves: List[Direction],
+) -> Iterator[None]:
+    """Move a tile to the row `i` and column `j` one step at a time.
+
+    Each step takes the blank around the tile to the cell the tile moves
+    to, and then swaps them. The tile first moves along its row until it
+    reaches column `j` and then moves up, so the cells above row `i` and
+    left of column `j` on row `i` may be locked. With `transposed`,
+    rows and columns are swapped.
+
+    Once the blank is next to the tile, which is the case after its
+    first step, a step is a lookup of `step_route` applied in bulk.
+
+    This is a generator that yields after every step, once its moves
+    are applied to `puzzle` and appended to `moves`.
     """
-    We move the target tile to the left side of board.
-    If we find the target tile column, then we move up otherwise
-    we move diagonally to the left.
-    """
-    i0, j0 = puzzle.tile_pos[0]
-    i, j = puzzle.tile_pos[target]
-    while (i, j) != (it, jt):
-        if j == jt:
-            move_up_left(puzzle, target, it, jt, left_limit, up_limit)
-        elif i == it:
-            move_left_down_row(puzzle, target, it, jt, left_limit, up_limit)
+    n = puzzle.n
+    dst = _cell(n, i, j, transposed)
+    pos = puzzle.positions[tile]
+    while pos != dst:
+        ti, tj = divmod(pos, n)
+        if transposed:
+            ti, tj = tj, ti
+        if tj < j:
+            tj += 1
+        elif tj > j:
+            tj -= 1
+        elif ti > i:
+            ti -= 1
         else:
-            move_diagonally_left(puzzle, target, it, jt, left_limit, up_limit)
-        i, j = puzzle.tile_pos[target]
+            ti += 1
+        step = _cell(n, ti, tj, transposed)
+        route = None
+        pi, pj = divmod(pos, n)
+        bi, bj = divmod(puzzle.positions[0], n)
+        if abs(bi - pi) <= 1 and abs(bj - pj) <= 1:
+            si, sj = divmod(step, n)
+            route = step_route(
+                n,
+                CENTER + (bi - pi) * SIDE + bj - pj,
+                CENTER + (si - pi) * SIDE + sj - pj,
+                step_window(n, locked, pos),
+            )
+        if route is not None:
+            apply_steps(puzzle, route, moves)
+        else:
+            move_blank(puzzle, step, locked, pos, moves)
+            move_blank(puzzle, pos, locked, -1, moves)
+        pos = puzzle.positions[tile]
+        yield
 
 
-def move_right_down(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Moves a tile to the right, passing the blank tile down the target
-    tile.
-    """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.LEFT,
-        Direction.DOWN,
-        Direction.RIGHT,
-        Direction.RIGHT,
-        Direction.UP,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, left_limit, up_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
+def _goal_tile(n: int, i: int, j: int, transposed: bool) -> int:
+    return _cell(n, i, j, transposed) + 1
 
 
-def move_target_tile_to_row_right(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
+def _apply(
+    puzzle: NPuzzle, plan: List[Direction], transposed: bool, moves: List[Direction]
 ) -> None:
+    if transposed:
+        plan = transpose_plan(plan)
+    apply_plan(puzzle, plan, moves)
+
+
+def complete_line(
+    puzzle: NPuzzle,
+    line: int,
+    locked: bytearray,
+    transposed: bool,
+    moves: List[Direction],
+) -> Iterator[None]:
+    """Place the last two tiles of a row, or of a column if `transposed`.
+
+    The second to last tile is moved to the last column and the last
+    tile right below it. The blank then goes around them to the left of
+    the first and both slide into place. If the last tile gets trapped
+    between the second to last and the solved part of the row, the row
+    is completed with `TRAPPED_LAST_TILE` instead.
+
+    For example in a 4x4 board:
+
+    -----------------        -----------------        -----------------
+    |  1|  2| 12| 15|        |  1|  2|   |  3|        |  1|  2|  3|  4|
+    -----------------        -----------------        -----------------
+    | 14| 13|  8|  3|  --->  | 14| 13| 12|  4|  --->  | 14| 13| 12|   |
+    -----------------        -----------------        -----------------
+    | 10|  6|  4|   |        | 10|  6|  8| 15|        | 10|  6|  8| 15|
+    -----------------        -----------------        -----------------
+    |  7| 11|  9|  5|        |  7| 11|  9|  5|        |  7| 11|  9|  5|
+    -----------------        -----------------        -----------------
     """
-    In the case the target position is to the right of the current target
-    tile position, we call this function. This function moves the target
-    from (i, j) to (it, jt) using "right" moves.
-    """
-    i0, j0 = puzzle.tile_pos[0]
-    i, j = puzzle.tile_pos[target]
-    while (i, j) != (it, jt):
-        # Cases in which the target tile is on the last column
-        if j == puzzle.n - 1 and j0 == j - 1:
-            move_up_right(puzzle, target, it, jt, left_limit, up_limit)
-        # We found the target column position. We need to move up
-        elif j == jt:
-            move_up_left(puzzle, target, it, jt, left_limit, up_limit)
-        # This is a corner case when the tile is already in the target row
-        # But not in place. We need to be careful of not moving tiles on
-        # the left of this tile so we move right passing the blank down the tile
-        elif i == it:
-            move_right_down(puzzle, target, it, jt, left_limit, up_limit)
-            i, j = puzzle.tile_pos[target]
-            i0, j0 = puzzle.tile_pos[0]
-            # This is for the case in which we move the second to last tile
-            # To close the row we need to be below the last moved tile
-            if j0 == j - 1:
-                animate_plan(puzzle, [Direction.DOWN, Direction.RIGHT])
+    n = puzzle.n
+    first = _goal_tile(n, line, n - 2, transposed)
+    last = _goal_tile(n, line, n - 1, transposed)
+    first_dst = _cell(n, line, n - 2, transposed)
+    last_dst = _cell(n, line, n - 1, transposed)
+    if puzzle.positions[first] != first_dst or puzzle.positions[last] != last_dst:
+        yield from tile_steps(puzzle, first, line, n - 1, locked, transposed, moves)
+        locked[last_dst] = 1
+        # The blank can't leave the target of the second to last tile
+        # without pulling up the tile below it
+        if puzzle.positions[0] == first_dst:
+            _apply(puzzle, [Direction.DOWN], transposed, moves)
+        trapped = puzzle.positions[last] == first_dst
+        if trapped:
+            below = _cell(n, line + 1, n - 2, transposed)
+            move_blank(puzzle, below, locked, first_dst, moves)
+            _apply(puzzle, TRAPPED_LAST_TILE, transposed, moves)
+            yield
         else:
-            if i0 - 1 != up_limit or (jt - 1 == j and it != up_limit):
-                move_diagonally_right(puzzle, target, it, jt, left_limit, up_limit)
-                i, j = puzzle.tile_pos[target]
-                if jt == j == puzzle.n - 1 and it != i:
-                    animate_plan(puzzle, [Direction.LEFT, Direction.UP])
-            else:
-                move_right_down(puzzle, target, it, jt, left_limit, up_limit)
-                if jt == puzzle.n - 1 == j:
-                    animate_plan(puzzle, [Direction.LEFT, Direction.UP])
-
-        i, j = puzzle.tile_pos[target]
-        i0, j0 = puzzle.tile_pos[0]
-
-
-def complete_row(puzzle: NPuzzle) -> None:
+            yield from tile_steps(
+                puzzle, last, line + 1, n - 1, locked, transposed, moves
+            )
+            locked[_cell(n, line + 1, n - 1, transposed)] = 1
+            move_blank(puzzle, first_dst, locked, -1, moves)
+            _apply(puzzle, [Direction.RIGHT, Direction.DOWN], transposed, moves)
+            locked[_cell(n, line + 1, n - 1, transposed)] = 0
+            yield
+    locked[first_dst] = 1
+    locked[last_dst] = 1
+
+
+def process_line(
+    puzzle: NPuzzle,
+    line: int,
+    start: int,
+    locked: bytearray,
+    transposed: bool,
+    moves: List[Direction],
+) -> Iterator[None]:
+    """Solve a row from the column `start` on, or a column if `transposed`.
+
+    Tiles are placed one by one from left to right, locking each one
+    once it is in place, and the last two are placed together by
+    `complete_line`. Like them, this is a generator that yields after
+    every step of a tile.
     """
-    Completes the row. When we are finishing a row, we move
-    the second to last tile to the position (1, n) and the last
-    tile to the position (2, n). For example in a 4x4 board we
-    would have the following state:
-
-    -----------------
-    |  1|  2| 12|  3|
-    -----------------
-    | 14| 13|  8|  4|
-    -----------------
-    | 10|  6| 15|   |
-    -----------------
-    |  7| 11|  9|  5|
-    -----------------
-
-    This function applies the actions needed to get to:
+    n = puzzle.n
+    for j in range(start, n - 2):
+        tile = _goal_tile(n, line, j, transposed)
+        yield from tile_steps(puzzle, tile, line, j, locked, transposed, moves)
+        locked[_cell(n, line, j, transposed)] = 1
+    yield from complete_line(puzzle, line, locked, transposed, moves)
 
-    -----------------
-    |  1|  2|  3|  4|
-    -----------------
-    | 14| 13| 12|   |
-    -----------------
-    | 10|  6|  8| 15|
-    -----------------
-    |  7| 11|  9|  5|
-    -----------------
-    """
-    plan = [
-        Direction.LEFT,
-        Direction.UP,
-        Direction.UP,
-        Direction.RIGHT,
-        Direction.DOWN,
-    ]
-    for action in plan:
-        animate_plan(puzzle, [action])
-
-
-def move_blank_to_target_down(
-    puzzle: NPuzzle, target_tile: int, it: int, jt: int
-) -> None:
-    """
-    This follows a similar logic, but puts the blank tile below
-    the target tile. Mostly used to move tiles to the target column.
-    We also use it to address some corner cases when we are completing
-    rows.
-    """
-    # Corner case in which the target position is at the end
-    # and the target tile is as well at the end
-    # In this case the blank will be on the above the target
-    i0, j0 = puzzle.tile_pos[0]
-    i, j = puzzle.tile_pos[target_tile]
-    if it == puzzle.n - 1 and i == puzzle.n - 1:
-        if i0 == i:
-            action = Direction.UP
-            animate_plan(puzzle, [action])
-        else:
-            while i0 != i - 1:
-                action = Direction.DOWN
-                animate_plan(puzzle, [action])
-                i0, j0 = puzzle.tile_pos[0]
-    else:
-        # In any other case we just move the blank
-        # below the target
-        limit = i + 1 if i < puzzle.n - 1 else i - 1
-        while i0 != limit:
-            if i0 > i:
-                action = Direction.UP
-            else:
-                action = Direction.DOWN
-            animate_plan(puzzle, [action])
-            i0, j0 = puzzle.tile_pos[0]
-            i, j = puzzle.tile_pos[target_tile]
-            limit = i + 1 if i < puzzle.n - 1 else i - 1
-            # We don't want to get stuck in case that the
-            # tile is at the bottom
-            if i == puzzle.n - 1 and i0 == puzzle.n - 2:
-                break
-
-    # Move the blank tile to the same position of the
-    # target tile
-    while j0 != j:
-        if j0 > j:
-            animate_plan(puzzle, [Direction.LEFT])
-        else:
-            animate_plan(puzzle, [Direction.RIGHT])
-        i0, j0 = puzzle.tile_pos[0]
-    if i0 < i and not (it == puzzle.n - 1 and i == puzzle.n - 1):
-        animate_plan(puzzle, [Direction.DOWN])
-        i0, j0 = puzzle.tile_pos[0]
-        i, j = puzzle.tile_pos[target_tile]
 
-    # We always will want to be below the target tile
-    if i == puzzle.n - 1 and i0 == puzzle.n - 2 and it != puzzle.n - 1:
-        animate_plan(puzzle, [Direction.DOWN])
+def row_steps(puzzle: NPuzzle, it: int, moves: List[Direction]) -> Iterator[None]:
+    """Same as `process_row`, yielding after every step of a tile"""
+    locked = locked_cells(puzzle.n, it, it)
+    return process_line(puzzle, it, it, locked, False, moves)
 
 
-def prevent_disturbing_row(puzzle, tile, i, j):
-    """
-    This fix cases in which we want to place a target tile and
-    the tile target + 1 is already in place. We move the target + 1
-    out of its position to avoid disturbing it while moving target
-    """
-    pos = puzzle.tile_pos[tile]
-    # Case in which the last tile is already in its position
-    # We need to take it out of it so we can move the previous
-    # tile to position N without disturbing the row
-    if pos == (i, j):
-        move_blank_to_target_down(puzzle, tile, i, j)
-        animate_plan(
-            puzzle,
-            [
-                Direction.UP,
-                Direction.LEFT,
-                Direction.DOWN,
-                Direction.DOWN,
-                Direction.RIGHT,
-                Direction.UP,
-            ],
-        )
+def column_steps(puzzle: NPuzzle, jt: int, moves: List[Direction]) -> Iterator[None]:
+    """Same as `process_column`, yielding after every step of a tile"""
+    locked = locked_cells(puzzle.n, jt + 1, jt)
+    return process_line(puzzle, jt, jt + 1, locked, True, moves)
 
 
-def process_row(puzzle: NPuzzle, it: int, start_value: int) -> None:
+def process_row(puzzle: NPuzzle, it: int, moves: List[Direction]) -> None:
     """Complete a row.
 
     In this context, by completing a row we mean that we get all the
-    tiles in the target row sorted.
+    tiles in the target row sorted. The rows above `it` and the columns
+    left of it must be solved already, and they are left untouched.
 
     For example if our starting puzzle is:
 
@@ -456,293 +444,24 @@ def process_row(puzzle: NPuzzle, it: int, start_value: int) -> None:
     |  3|  1|  2|   |
     -----------------
 
-    After calling this method the puzzle will look like:
+    After calling this method with `it = 0` the first row will be:
 
     -----------------
     |  1|  2|  3|  4|
     -----------------
-    | 14| 13| 12|   |
-    -----------------
-    | 10|  6|  8| 15|
-    -----------------
-    |  7| 11|  9|  5|
-    -----------------
-    """
-    target_tile: int = start_value
-    left_limit, right_limit = it, it
-    for jt in range(it, puzzle.n):
-        i, j = puzzle.tile_pos[target_tile]
-        if target_tile == puzzle.n * (it + 1) - 1:
-            jt = puzzle.n - 1
-            last = puzzle.n * (it + 1)
-            prevent_disturbing_row(puzzle, last, it, jt)
-        elif target_tile == puzzle.n * (it + 1):
-            it = it + 1
-        else:
-            if target_tile + 1 in puzzle.tile_pos:
-                (ii, jj) = puzzle.tile_pos[target_tile + 1]
-                if (ii, jj) == (it, jt + 1):
-                    prevent_disturbing_row(puzzle, target_tile + 1, it, jt + 1)
-        move_blank_to_target(puzzle, target_tile, it, jt)
-        # Target position is on the left side
-        if has_to_move_right(puzzle, j, jt):
-            move_target_tile_to_row_right(
-                puzzle, target_tile, it, jt, left_limit, right_limit
-            )
-        else:
-            move_target_tile_to_row_left(
-                puzzle, target_tile, it, jt, left_limit, right_limit
-            )
-        target_tile += 1
-    complete_row(puzzle)
-
-
-def move_diagonally_down(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Moves the target tile diagonally up left. It assumes that the
-    blank tile is down the target tile
-    """
-    plan = [
-        Direction.UP,
-        Direction.LEFT,
-        Direction.DOWN,
-        Direction.RIGHT,
-        Direction.DOWN,
-        Direction.LEFT,
-    ]
-
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, up_limit, left_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
-
 
-def move_left_up(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Used for the cases in which the target is in the last row.
-    Assumes that the blank is on top of the target
-    """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.LEFT,
-        Direction.DOWN,
-        Direction.RIGHT,
-        Direction.UP,
-        Direction.LEFT,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, up_limit, left_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_diagonally_up(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Moves the target tile diagonally up. It assumes that the
-    blank tile is on the down of the target tile
+    The moves are applied to `puzzle` and appended to `moves`.
     """
-    i0, j0 = puzzle.tile_pos[0]
-    plan = [
-        Direction.LEFT,
-        Direction.UP,
-        Direction.RIGHT,
-        Direction.UP,
-        Direction.LEFT,
-        Direction.DOWN,
-    ]
-
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, up_limit, left_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        i0, j0 = puzzle.tile_pos[0]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_left_down(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    This moves the target tile to the left rotating down the tile
-    to avoid touching the upper row (might be the already sorted one).
-    Assumes the blank is down the target
-    """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.LEFT,
-        Direction.UP,
-        Direction.RIGHT,
-        Direction.DOWN,
-        Direction.LEFT,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, up_limit, left_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
+    for _ in row_steps(puzzle, it, moves):
+        pass
 
 
-def has_to_move_down(puzzle: NPuzzle, i: int, it: int):
-    """
-    We move up if target position is on the above
-    of the i
-    """
-    return i < it or i == it and it == puzzle.n - 1
-
+def process_column(puzzle: NPuzzle, jt: int, moves: List[Direction]) -> None:
+    """Complete a column below its already solved row.
 
-def move_up_by_right(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-) -> None:
-    """
-    Assumes blank is below the target and that the target it is already
-    placed in the target column
+    The rows above and including `jt` and the columns left of it must
+    be solved already. The column is solved as a row of the transposed
+    board, so the moves mirror the ones of `process_row`.
     """
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.RIGHT,
-        Direction.UP,
-        Direction.UP,
-        Direction.LEFT,
-        Direction.DOWN,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, up_limit, left_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_target_tile_to_column_up(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-):
-    i0, j0 = puzzle.tile_pos[0]
-    i, j = puzzle.tile_pos[target]
-    while (i, j) != (it, jt):
-        if i == it:
-            move_left_down(puzzle, target, it, jt, up_limit, left_limit)
-        elif j == jt:
-            move_up_by_right(puzzle, target, it, jt, up_limit, left_limit)
-        else:
-            move_diagonally_up(puzzle, target, it, jt, up_limit, left_limit)
-        i, j = puzzle.tile_pos[target]
-    i0, j0 = puzzle.tile_pos[0]
-
-    # For cases in which we move up the tile and end stuck in the
-    # Target column
-    if j0 == left_limit:
-        animate_plan(puzzle, [Direction.RIGHT])
-        if i0 > up_limit:
-            animate_plan(puzzle, [Direction.UP])
-
-
-def move_down(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-):
-    i, j = puzzle.tile_pos[target]
-    plan = [
-        Direction.UP,
-        Direction.RIGHT,
-        Direction.DOWN,
-        Direction.DOWN,
-        Direction.LEFT,
-    ]
-    for action in plan:
-        i0, j0 = puzzle.tile_pos[0]
-        if invalid_action(puzzle, i0, j0, action, up_limit, left_limit):
-            break
-        animate_plan(puzzle, [action])
-        i, j = puzzle.tile_pos[target]
-        if (i, j) == (it, jt):
-            break
-
-
-def move_target_tile_to_column_down(
-    puzzle: NPuzzle, target: int, it: int, jt: int, left_limit: int, up_limit: int
-):
-    i0, j0 = puzzle.tile_pos[0]
-    i, j = puzzle.tile_pos[target]
-    while (i, j) != (it, jt):
-        if i == puzzle.n - 1 == it:
-            move_left_up(puzzle, target, it, jt, up_limit, left_limit)
-        elif i == it:
-            move_left_down(puzzle, target, it, jt, up_limit, left_limit)
-        elif j == jt or (j == jt + 1 and it > i + 1):
-            move_down(puzzle, target, it, jt, up_limit, left_limit)
-            # Case in which I moved the target tile just one step down
-            # and the goal is puzzle.n - 1
-            i, j = puzzle.tile_pos[target]
-            if i == puzzle.n - 1:
-                animate_plan(puzzle, [Direction.RIGHT, Direction.DOWN])
-        else:
-            move_diagonally_down(puzzle, target, it, jt, up_limit, left_limit)
-            i, j = puzzle.tile_pos[target]
-            # If it is at the end of the row but it is not the last tile
-            # to move
-            if it == i == puzzle.n - 1:
-                animate_plan(puzzle, [Direction.UP, Direction.LEFT])
-        i, j = puzzle.tile_pos[target]
-        i0, j0 = puzzle.tile_pos[0]
-
-    # Case in which we moved diagonally down the second to last
-    # tile to the last row
-    if it == puzzle.n - 1 == i0 + 1:
-        animate_plan(puzzle, [Direction.RIGHT, Direction.DOWN])
-
-
-def complete_column(puzzle: NPuzzle):
-    plan = [
-        Direction.UP,
-        Direction.LEFT,
-        Direction.LEFT,
-        Direction.DOWN,
-        Direction.RIGHT,
-    ]
-    for action in plan:
-        animate_plan(puzzle, [action])
-
-
-def process_column(puzzle: NPuzzle, jt: int, start_value: int):
-    target_tile = start_value + puzzle.n
-    up_limit, left_limit = jt, jt
-    for it in range(jt + 1, puzzle.n):
-        i, j = puzzle.tile_pos[target_tile]
-        if target_tile == 1 + puzzle.n * (puzzle.n - 1) + jt:
-            jt = jt + 1
-        elif target_tile == 1 + puzzle.n * (puzzle.n - 2) + jt:
-            it = puzzle.n - 1
-
-        move_blank_to_target_down(puzzle, target_tile, it, jt)
-        # Target position is on the bottom side
-        if has_to_move_down(puzzle, i, it):
-            move_target_tile_to_column_down(
-                puzzle, target_tile, it, jt, up_limit, left_limit
-            )
-        else:
-            move_target_tile_to_column_up(
-                puzzle, target_tile, it, jt, up_limit, left_limit
-            )
-        target_tile += puzzle.n
-    complete_column(puzzle)
+    for _ in column_steps(puzzle, jt, moves):
+        pass
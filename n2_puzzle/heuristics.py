@@ -0,0 +1,394 @@
+from collections import deque
+from functools import lru_cache, partial
+from itertools import product
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+
+@lru_cache(maxsize=None)
+def manhattan_table(n: int, goal: bytes) -> Tuple[Tuple[int, ...], ...]:
+    """Distance table for the Manhattan heuristic.
+
+    `table[tile][pos]` is the Manhattan distance between the flat
+    position `pos` and the position of `tile` in the packed `goal`
+    board. The row of the blank tile is all zeros, so summing over
+    a board never counts the blank. The table is built once per
+    (n, goal) pair.
+    """
+    table = [(0,) * (n * n)] * (max(goal) + 1)
+    for goal_pos, tile in enumerate(goal):
+        if tile:
+            i2, j2 = divmod(goal_pos, n)
+            table[tile] = tuple(
+                abs(pos // n - i2) + abs(pos % n - j2) for pos in range(n * n)
+            )
+    return tuple(table)
+
+
+def _longest_increasing(values: Tuple[int, ...]) -> int:
+    ends: list = []
+    for value in values:
+        i = 0
+        while i < len(ends) and ends[i] < value:
+            i += 1
+        if i == len(ends):
+            ends.append(value)
+        else:
+            ends[i] = value
+    return len(ends)
+
+
+@lru_cache(maxsize=None)
+def line_conflict_table(n: int) -> Tuple[int, ...]:
+    """Extra moves forced by the linear conflicts of a row or column.
+
+    A line of the board is encoded in base n + 1, the j-th digit being
+    the goal position along the line of the tile at its j-th cell, or
+    n if the tile (or the blank) belongs to another line. Tiles whose
+    goal order is reversed in the line can't pass each other without
+    one of them leaving the line, which takes two moves more than their
+    Manhattan distance. The entry of each code is twice the number of
+    tiles that have to leave the line, the ones out of a longest
+    increasing subsequence.
+    """
+    table = []
+    for digits in product(range(n + 1), repeat=n):
+        # The first cell is the lowest digit
+        tiles = tuple(digit for digit in digits[::-1] if digit < n)
+        table.append(2 * (len(tiles) - _longest_increasing(tiles)))
+    return tuple(table)
+
+
+class Heuristic:
+    """Admissible heuristic over packed boards.
+
+    A heuristic is built once for a goal, given as the board size `n`
+    and the packed `goal` board, and is then evaluated on packed boards
+    of the same size.
+    """
+
+    def __init__(self, n: int, goal: bytes) -> None:
+        self.n = n
+        self.goal = goal
+
+    def __call__(self, board: bytes) -> int:
+        """Heuristic value of a packed board"""
+        raise NotImplementedError
+
+    def update(self, h: int, board: bytes, tile: int, src: int, dst: int) -> int:
+        """Heuristic value of `board` after a single move.
+
+        `board` was reached by moving `tile` from the position `src`
+        to the position `dst` in a board whose heuristic value is `h`.
+        Subclasses override this when the value can be updated without
+        evaluating the whole board.
+        """
+        return self(board)
+
+
+class ManhattanHeuristic(Heuristic):
+    """Sum of the Manhattan distances of the tiles to their goal.
+
+    One move changes the distance of a single tile, so the value is
+    updated in O(1) from the one of the parent board.
+    """
+
+    def __init__(self, n: int, goal: bytes) -> None:
+        super().__init__(n, goal)
+        self.table = manhattan_table(n, goal)
+
+    def __call__(self, board: bytes) -> int:
+        table = self.table
+        return sum(table[tile][pos] for pos, tile in enumerate(board))
+
+    def update(self, h: int, board: bytes, tile: int, src: int, dst: int) -> int:
+        distances = self.table[tile]
+        return h - distances[src] + distances[dst]
+
+
+class LinearConflictHeuristic(ManhattanHeuristic):
+    """Manhattan distance plus the linear conflicts of every line.
+
+    Two tiles in their goal row, but in reversed order, can't pass each
+    other without one of them leaving the row, which costs two moves
+    more than their Manhattan distance, and the same goes for columns.
+    The extra moves of a line are read from `line_conflict_table`, so
+    the heuristic is admissible and only supported up to n = 6.
+
+    A horizontal move only changes the conflicts of the columns the
+    tile leaves and enters, and a vertical one the conflicts of two
+    rows, so only those lines are evaluated after a move.
+    """
+
+    def __init__(self, n: int, goal: bytes) -> None:
+        if n > 6:
+            raise ValueError("Linear conflicts are only supported up to n = 6")
+        super().__init__(n, goal)
+        self.conflicts = line_conflict_table(n)
+        # Digit of every tile in the code of every row and column: its
+        # goal column (row) if its goal is in that row (column), or n
+        self.row_digits = [[n] * n for _ in range(len(self.table))]
+        self.column_digits = [[n] * n for _ in range(len(self.table))]
+        for pos, tile in enumerate(goal):
+            if tile:
+                i, j = divmod(pos, n)
+                self.row_digits[tile][i] = j
+                self.column_digits[tile][j] = i
+
+    def _row(self, board: bytes, i: int) -> int:
+        n = self.n
+        code = 0
+        for pos in range((i + 1) * n - 1, i * n - 1, -1):
+            code = code * (n + 1) + self.row_digits[board[pos]][i]
+        return self.conflicts[code]
+
+    def _column(self, board: bytes, j: int) -> int:
+        n = self.n
+        code = 0
+        for pos in range((n - 1) * n + j, j - 1, -n):
+            code = code * (n + 1) + self.column_digits[board[pos]][j]
+        return self.conflicts[code]
+
+    def __call__(self, board: bytes) -> int:
+        return (
+            super().__call__(board)
+            + sum(self._row(board, i) for i in range(self.n))
+            + sum(self._column(board, j) for j in range(self.n))
+        )
+
+    def update(self, h: int, board: bytes, tile: int, src: int, dst: int) -> int:
+        h = super().update(h, board, tile, src, dst)
+        parent = bytearray(board)
+        parent[src] = tile
+        parent[dst] = 0
+        n = self.n
+        conflicts: Callable[[bytes, int], int]
+        if src // n == dst // n:
+            lines = (src % n, dst % n)
+            conflicts = self._column
+        else:
+            lines = (src // n, dst // n)
+            conflicts = self._row
+        for line in lines:
+            h += conflicts(board, line) - conflicts(bytes(parent), line)
+        return h
+
+
+@lru_cache(maxsize=None)
+def walking_distance_table(n: int, blank_line: int) -> Dict[Tuple[int, ...], int]:
+    """Walking distance of every arrangement of the tiles in the rows.
+
+    An arrangement counts, for every row i and goal row j, the tiles in
+    row i whose goal is in row j, followed by the row of the blank. It
+    is written as a tuple of the n * n counts and the blank row. A
+    vertical move takes a tile of the row above or below the blank into
+    the row of the blank, and the table, built with a BFS from the goal
+    arrangement (the blank in row `blank_line`), holds the fewest moves
+    that sort the tiles into their goal rows. The table also works for
+    columns, by swapping rows and columns.
+
+    There are 24,964 arrangements for n = 4, but millions for n = 5, so
+    only n <= 4 is supported.
+    """
+    if n > 4:
+        raise ValueError("The walking distance is only supported up to n = 4")
+    goal = [0] * (n * n + 1)
+    for i in range(n):
+        goal[i * n + i] = n
+    goal[blank_line * n + blank_line] -= 1
+    goal[-1] = blank_line
+    distances = {tuple(goal): 0}
+    queue = deque([tuple(goal)])
+    while queue:
+        state = queue.popleft()
+        distance = distances[state] + 1
+        blank = state[-1]
+        for row in (blank - 1, blank + 1):
+            if not 0 <= row < n:
+                continue
+            for j in range(n):
+                if state[row * n + j]:
+                    child = list(state)
+                    child[row * n + j] -= 1
+                    child[blank * n + j] += 1
+                    child[-1] = row
+                    key = tuple(child)
+                    if key not in distances:
+                        distances[key] = distance
+                        queue.append(key)
+    return distances
+
+
+class WalkingDistanceHeuristic(Heuristic):
+    """Walking distance of the rows plus walking distance of the columns.
+
+    Tiles are only told apart by their goal row (column), and the
+    walking distance is the number of vertical (horizontal) moves needed
+    to bring every tile to its goal row (column), read from
+    `walking_distance_table`. Vertical and horizontal moves are counted
+    apart, so the sum is admissible, and it is at least the Manhattan
+    distance. Only supported up to n = 4.
+    """
+
+    def __init__(self, n: int, goal: bytes) -> None:
+        super().__init__(n, goal)
+        blank_row, blank_column = divmod(goal.index(0), n)
+        self.rows_table = walking_distance_table(n, blank_row)
+        self.columns_table = walking_distance_table(n, blank_column)
+        # Goal row and column of every tile
+        self.goal_rows = [0] * len(goal)
+        self.goal_columns = [0] * len(goal)
+        for pos, tile in enumerate(goal):
+            self.goal_rows[tile], self.goal_columns[tile] = divmod(pos, n)
+
+    def __call__(self, board: bytes) -> int:
+        n = self.n
+        rows = [0] * (n * n + 1)
+        columns = [0] * (n * n + 1)
+        for pos, tile in enumerate(board):
+            i, j = divmod(pos, n)
+            if tile:
+                rows[i * n + self.goal_rows[tile]] += 1
+                columns[j * n + self.goal_columns[tile]] += 1
+            else:
+                rows[-1] = i
+                columns[-1] = j
+        return self.rows_table[tuple(rows)] + self.columns_table[tuple(columns)]
+
+
+# Heuristics that can be selected by name, built from the board size
+# and the packed goal board
+def _pattern_database(n: int, goal: bytes) -> Heuristic:
+    """`PatternDatabaseHeuristic` with the default partition of size `n`"""
+    # Imported here since the pattern databases are built with the
+    # moves of n2_puzzle.search, which imports this module
+    from n2_puzzle.pdb import PatternDatabaseHeuristic
+
+    return PatternDatabaseHeuristic(n, goal)
+
+
+HEURISTICS: Dict[str, Callable[[int, bytes], Heuristic]] = {
+    "manhattan": ManhattanHeuristic,
+    "linear-conflict": LinearConflictHeuristic,
+    "walking-distance": WalkingDistanceHeuristic,
+    "pdb": _pattern_database,
+}
+
+
+def register_heuristic(name: str, factory: Callable[[int, bytes], Heuristic]) -> None:
+    """Make a heuristic selectable by `name` in `make_heuristic`"""
+    HEURISTICS[name] = factory
+
+
+def make_heuristic(name: str, n: int, goal: bytes) -> Heuristic:
+    """Build the heuristic registered as `name` for the goal board"""
+    if name not in HEURISTICS:
+        raise ValueError(
+            f"Unknown heuristic {name!r}, expected one of {', '.join(HEURISTICS)}"
+        )
+    return HEURISTICS[name](n, goal)
+
+
+def resolve_heuristic(
+    heuristic: Optional[Union[Heuristic, str]], n: int, goal: bytes
+) -> Heuristic:
+    """Heuristic given to a search, by object or by name.
+
+    Names are looked up with `make_heuristic`, and no heuristic means
+    Manhattan distance.
+    """
+    if heuristic is None:
+        return ManhattanHeuristic(n, goal)
+    if isinstance(heuristic, str):
+        return make_heuristic(heuristic, n, goal)
+    return heuristic
+
+
+class BatchHeuristic(Heuristic):
+    """Manhattan distance, plus linear conflicts, of many boards at once.
+
+    `evaluate` scores a whole `(batch, n * n)` matrix of boards with
+    NumPy gathers, so the Python overhead is paid once per batch
+    instead of once per board. With `linear_conflict`, the extra moves
+    of the conflicts in every row and column, from
+    `line_conflict_table`, are added to the Manhattan distance, which
+    keeps the heuristic admissible. The table has `(n + 1) ** n`
+    entries, so conflicts are only supported up to n = 6.
+
+    NumPy is an optional dependency, only needed by this class.
+    """
+
+    def __init__(self, n: int, goal: bytes, linear_conflict: bool = False) -> None:
+        if np is None:
+            raise ImportError("BatchHeuristic requires numpy")
+        if linear_conflict and n > 6:
+            raise ValueError("Linear conflicts are only supported up to n = 6")
+        super().__init__(n, goal)
+        self.linear_conflict = linear_conflict
+        self.table = np.array(manhattan_table(n, goal), dtype=np.int32)
+        # Goal row and column of every tile, n for the blank so that it
+        # never belongs to a line
+        self.rows = np.full(len(self.table), n, dtype=np.int32)
+        self.columns = np.full(len(self.table), n, dtype=np.int32)
+        for pos, tile in enumerate(goal):
+            if tile:
+                self.rows[tile], self.columns[tile] = divmod(pos, n)
+        self.lines = np.arange(n, dtype=np.int32)
+        self.powers = (n + 1) ** self.lines
+        if linear_conflict:
+            self.conflicts = np.array(line_conflict_table(n), dtype=np.int32)
+
+    def evaluate(self, boards: Any) -> Any:
+        """Heuristic values of a `(batch, n * n)` array of boards"""
+        n = self.n
+        h = self.table[boards, np.arange(n * n)].sum(axis=1)
+        if self.linear_conflict:
+            lines = self.lines
+            tiles = boards.reshape(-1, n, n)
+            rows = self.rows[tiles]
+            columns = self.columns[tiles]
+            # Rows: the digits are the goal columns of the tiles whose
+            # goal is in that row
+            digits = np.where(rows == lines[None, :, None], columns, n)
+            h += self.conflicts[(digits * self.powers).sum(axis=2)].sum(axis=1)
+            digits = np.where(columns == lines[None, None, :], rows, n)
+            codes = (digits * self.powers[None, :, None]).sum(axis=1)
+            h += self.conflicts[codes].sum(axis=1)
+        return h
+
+    def __call__(self, board: bytes) -> int:
+        return int(self.evaluate(np.frombuffer(board, dtype=np.uint8)[None, :])[0])
+
+
+# Heuristics that `batched_a_star` can select by name
+BATCH_HEURISTICS: Dict[str, Callable[[int, bytes], BatchHeuristic]] = {
+    "manhattan": BatchHeuristic,
+    "linear-conflict": partial(BatchHeuristic, linear_conflict=True),
+}
+
+
+def resolve_batch_heuristic(
+    heuristic: Optional[Union[Heuristic, str]], n: int, goal: bytes
+) -> BatchHeuristic:
+    """Heuristic given to a batched search, by object or by name.
+
+    Names are looked up in `BATCH_HEURISTICS`, and no heuristic means
+    Manhattan distance. Heuristics that can't score a batch of boards
+    are rejected.
+    """
+    if heuristic is None:
+        return BatchHeuristic(n, goal)
+    if isinstance(heuristic, str):
+        if heuristic not in BATCH_HEURISTICS:
+            raise ValueError(
+                f"Heuristic {heuristic!r} can't be batched, expected one of "
+                f"{', '.join(BATCH_HEURISTICS)}"
+            )
+        return BATCH_HEURISTICS[heuristic](n, goal)
+    if not isinstance(heuristic, BatchHeuristic):
+        raise ValueError(f"{type(heuristic).__name__} can't be batched")
+    return heuristic
@@ -0,0 +1,248 @@
+import contextlib
+import multiprocessing
+import os
+import queue
+import sys
+import zlib
+from typing import Any, List, Optional, Tuple, Union
+
+from n2_puzzle.heuristics import Heuristic, resolve_heuristic
+from n2_puzzle.puzzle import Direction
+from n2_puzzle.search import PackedState, SearchStats, State, pack
+from n2_puzzle.utils import OpenList
+
+# Nodes expanded by a worker before its successors are sent to their
+# owners. Larger batches send fewer messages, smaller ones keep the
+# workers closer to the global best-first order.
+BATCH = 32
+
+# Seconds an idle worker waits for nodes before checking again if the
+# search is over
+POLL = 0.005
+
+# A node sent between workers: board, blank position, depth, heuristic
+# value and the plan that reached it, one byte per move
+Node = Tuple[bytes, int, int, int, bytes]
+
+
+def owner(board: bytes, workers: int) -> int:
+    """Worker that owns a board.
+
+    `hash` is salted differently in every process, so boards are
+    distributed with CRC32 instead.
+    """
+    return zlib.crc32(board) % workers
+
+
+class _Shared:
+    """State shared by the workers of a search.
+
+    `sent` and `received` count the batches of nodes exchanged, and
+    `idle` flags the workers that ran out of nodes. They are updated
+    under `lock`, so the search is over when every worker is idle and
+    every batch sent has been received. `incumbent` is the length of
+    the best plan found so far.
+    """
+
+    def __init__(self, ctx: Any, workers: int) -> None:
+        self.lock = ctx.Lock()
+        self.sent = ctx.Value("q", 0, lock=False)
+        self.received = ctx.Value("q", 0, lock=False)
+        self.idle = ctx.Array("b", workers, lock=False)
+        self.incumbent = ctx.Value("q", sys.maxsize, lock=False)
+        self.done = ctx.Event()
+
+    def finished(self) -> bool:
+        with self.lock:
+            return all(self.idle) and self.sent.value == self.received.value
+
+
+def _worker(
+    index: int,
+    goal: bytes,
+    heuristic: Heuristic,
+    inboxes: List[Any],
+    results: Any,
+    shared: _Shared,
+) -> None:
+    """Search the boards owned by worker `index`.
+
+    The worker keeps its own open list, whose best depths double as its
+    closed list, and expands its nodes in f order. A board reached again
+    by a shorter path is reopened, since the workers together don't
+    expand the nodes in global f order. Successors owned by other
+    workers are sent to them in batches, and plans reaching the goal
+    are sent to `results`.
+    """
+    workers = len(inboxes)
+    inbox = inboxes[index]
+    n = heuristic.n
+    open_list = OpenList()
+    stats = SearchStats()
+    outboxes: List[List[Node]] = [[] for _ in range(workers)]
+
+    def push(node: Node) -> None:
+        board, _, g, h, _ = node
+        if g + h >= shared.incumbent.value:
+            return
+        if open_list.push(node, g + h, board, g):
+            stats.generated += 1
+        else:
+            stats.duplicates += 1
+
+    def receive(nodes: List[Node]) -> None:
+        with shared.lock:
+            shared.idle[index] = 0
+            shared.received.value += 1
+        for node in nodes:
+            push(node)
+
+    def flush() -> None:
+        for worker, nodes in enumerate(outboxes):
+            if nodes:
+                with shared.lock:
+                    shared.sent.value += 1
+                inboxes[worker].put(nodes)
+                outboxes[worker] = []
+
+    def expand(node: Node) -> None:
+        board, blank, g, h, plan = node
+        if board == goal:
+            with shared.lock:
+                if g < shared.incumbent.value:
+                    shared.incumbent.value = g
+                    results.put(("plan", plan))
+            return
+        stats.expanded += 1
+        state = PackedState(board, n, blank, depth=g, h=h)
+        for child in state.neighbors(heuristic):
+            assert child.action is not None
+            node = (
+                child.board,
+                child.blank,
+                child.depth,
+                child.h,
+                plan + bytes((child.action.value,)),
+            )
+            worker = owner(child.board, workers)
+            if worker == index:
+                push(node)
+            else:
+                outboxes[worker].append(node)
+
+    while not shared.done.is_set():
+        while True:
+            try:
+                receive(inbox.get_nowait())
+            except queue.Empty:
+                break
+        for _ in range(BATCH):
+            if open_list.isEmpty():
+                break
+            node = open_list.pop()
+            # Nodes at least as long as the best plan can't improve it
+            if node[2] + node[3] < shared.incumbent.value:
+                expand(node)
+        stats.max_open = max(stats.max_open, len(open_list))
+        flush()
+        if open_list.isEmpty():
+            with shared.lock:
+                shared.idle[index] = 1
+            with contextlib.suppress(queue.Empty):
+                receive(inbox.get(timeout=POLL))
+    stats.visited = len(open_list.best)
+    results.put(("stats", stats))
+
+
+def _check_workers(processes: List[Any], search_over: bool) -> None:
+    """Raise a RuntimeError if a worker died.
+
+    Workers only return once the search is over, so before that any
+    worker that exited died, and after it only the ones that failed.
+    """
+    for index, process in enumerate(processes):
+        code = process.exitcode
+        if code is not None and (code or not search_over):
+            raise RuntimeError(f"Worker {index} of the search exited with code {code}")
+
+
+def hda_star(
+    init_state: Union[State, PackedState],
+    goal_state: Union[State, PackedState],
+    heuristic: Optional[Union[Heuristic, str]] = None,
+    stats: Optional[SearchStats] = None,
+    workers: Optional[int] = None,
+) -> List[Direction]:
+    """Hash distributed A* (HDA*) over `workers` processes.
+
+    Drop-in alternative to `a_star_puzzle`. Every board is owned by the
+    worker given by `owner`, which keeps the open and closed lists of
+    its boards, so the workers search without sharing any table and
+    only exchange the successors they generate. A worker that reaches
+    the goal shares the length of its plan, and the nodes that can't
+    beat it are pruned. The search ends when every worker is out of
+    nodes and no successor is on its way, so with an admissible
+    heuristic the plan is optimal. `workers` defaults to the number of
+    CPUs. The counters of all the workers are added up in `stats`.
+
+    If a worker dies, for instance because the heuristic raised, the
+    other workers are terminated and a RuntimeError is raised.
+    """
+    init_state = pack(init_state)
+    goal_state = pack(goal_state)
+    heuristic = resolve_heuristic(heuristic, goal_state.n, goal_state.board)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    ctx = multiprocessing.get_context()
+    shared = _Shared(ctx, workers)
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    root = (init_state.board, init_state.blank, 0, heuristic(init_state.board), b"")
+    shared.sent.value = 1
+    inboxes[owner(init_state.board, workers)].put([root])
+    processes = [
+        ctx.Process(
+            target=_worker,
+            args=(index, goal_state.board, heuristic, inboxes, results, shared),
+            daemon=True,
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    plans = []
+    try:
+        while not shared.finished():
+            try:
+                plans.append(results.get(timeout=POLL)[1])
+            except queue.Empty:
+                _check_workers(processes, False)
+        shared.done.set()
+        finished = 0
+        while finished < workers:
+            try:
+                kind, value = results.get(timeout=POLL)
+            except queue.Empty:
+                _check_workers(processes, True)
+                continue
+            if kind == "plan":
+                plans.append(value)
+                continue
+            finished += 1
+            if stats is not None:
+                stats.expanded += value.expanded
+                stats.generated += value.generated
+                stats.duplicates += value.duplicates
+                stats.max_open += value.max_open
+                stats.visited += value.visited
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        shared.done.set()
+        for process in processes:
+            process.join()
+    if not plans:
+        return []
+    return [Direction(action) for action in min(plans, key=len)]
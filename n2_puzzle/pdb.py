@@ -0,0 +1,231 @@
+import mmap
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from n2_puzzle.heuristics import Heuristic
+from n2_puzzle.search import blank_moves
+from n2_puzzle.symmetry import transposed_pattern, transposed_positions
+from n2_puzzle.utils import data_dir
+
+MAGIC = b"N2PDB1"
+
+# Value of the entries that can't be reached from the goal
+UNREACHABLE = 255
+
+# Disjoint partitions of the tiles of the goal board used by default.
+# Larger patterns give a stronger heuristic, but the size of the database
+# grows as (n * n) ** len(pattern) and it is built in pure Python.
+DEFAULT_PARTITIONS: Dict[int, Tuple[Tuple[int, ...], ...]] = {
+    3: ((1, 2, 3, 4), (5, 6, 7, 8)),
+    4: ((1, 2, 3, 5, 6), (4, 7, 8, 11, 12), (9, 10, 13, 14, 15)),
+    5: (
+        (1, 2, 6, 7),
+        (3, 4, 8, 9),
+        (5, 10, 15, 20),
+        (11, 12, 16, 17),
+        (13, 14, 18, 19),
+        (21, 22, 23, 24),
+    ),
+}
+
+
+def build_pattern_database(n: int, tiles: Sequence[int]) -> bytearray:
+    """Build the pattern database of `tiles` with a retrograde BFS.
+
+    The goal is the board generated by `generate_template_board(n,
+    is_goal=True)`, so the tile t belongs at the flat position t - 1.
+    The BFS starts from the goal and walks the abstract states made of
+    the positions of the pattern tiles and the position of the blank.
+    Only the moves of pattern tiles are counted, moving the blank over
+    any other tile is free, so the databases of disjoint patterns can
+    be added and the sum is still admissible.
+
+    The positions of the pattern tiles are encoded in base n * n, the
+    position of the i-th tile being the i-th digit. The entry at that
+    index is the minimum number of pattern moves over every position
+    of the blank, `UNREACHABLE` marks the unused indices.
+    """
+    size = n * n
+    radix = [size**slot for slot in range(len(tiles))]
+    table = bytearray([UNREACHABLE]) * size ** len(tiles)
+    seen = bytearray(size ** (len(tiles) + 1))
+    moves = blank_moves(n)
+    start = sum((tile - 1) * radix[slot] for slot, tile in enumerate(tiles))
+    frontier = [start * size + size - 1]
+    cost = 0
+    while frontier:
+        stack = []
+        for state in frontier:
+            if not seen[state]:
+                seen[state] = 1
+                stack.append(state)
+        frontier = []
+        while stack:
+            pattern, blank = divmod(stack.pop(), size)
+            if table[pattern] == UNREACHABLE:
+                table[pattern] = cost
+            slots = {}
+            rest = pattern
+            for slot in range(len(tiles)):
+                rest, pos = divmod(rest, size)
+                slots[pos] = slot
+            for _, pos in moves[blank]:
+                owner = slots.get(pos)
+                if owner is None:
+                    # The blank moves over a tile out of the pattern
+                    child = pattern * size + pos
+                    if not seen[child]:
+                        seen[child] = 1
+                        stack.append(child)
+                else:
+                    child = (pattern + (blank - pos) * radix[owner]) * size + pos
+                    if not seen[child]:
+                        frontier.append(child)
+        cost += 1
+    return table
+
+
+def pattern_database_path(n: int, tiles: Sequence[int]) -> str:
+    name = f"pdb-{n}-{'-'.join(str(tile) for tile in tiles)}.bin"
+    return os.path.join(data_dir(), name)
+
+
+def save_pattern_database(
+    path: str, n: int, tiles: Sequence[int], table: bytearray
+) -> None:
+    """Save a pattern database to disk.
+
+    The file holds a small header (magic bytes, n, number of tiles and
+    the tiles of the pattern) followed by one byte per entry. The file
+    is written next to its final path and then renamed, so concurrent
+    readers never see a partial database.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + bytes([n, len(tiles)]) + bytes(tiles))
+        f.write(table)
+    os.replace(tmp_path, path)
+
+
+class PatternDatabase:
+    """Pattern database memory-mapped from disk"""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = len(MAGIC)
+        if self._mmap[:header] != MAGIC:
+            raise ValueError(f"{path} is not a pattern database")
+        self.n = self._mmap[header]
+        k = self._mmap[header + 1]
+        self.tiles = tuple(self._mmap[header + 2 : header + 2 + k])
+        self.table = memoryview(self._mmap)[header + 2 + k :]
+        if len(self.table) != (self.n * self.n) ** k:
+            raise ValueError(f"{path} is truncated")
+
+    def __getitem__(self, index: int) -> int:
+        return self.table[index]
+
+    @classmethod
+    def load(cls, n: int, tiles: Sequence[int]) -> "PatternDatabase":
+        """Load the pattern database of `tiles`.
+
+        The database is built and saved the first time it is needed,
+        afterwards it is only memory-mapped. Databases are shared by
+        every heuristic of the process.
+        """
+        key = (n, tuple(tiles))
+        database = _databases.get(key)
+        if database is None:
+            path = pattern_database_path(n, tiles)
+            if not os.path.exists(path):
+                save_pattern_database(path, n, tiles, build_pattern_database(n, tiles))
+            database = _databases[key] = cls(path)
+        return database
+
+
+_databases: Dict[Tuple[int, Tuple[int, ...]], PatternDatabase] = {}
+
+
+class PatternDatabaseHeuristic(Heuristic):
+    """Additive disjoint pattern database heuristic.
+
+    The value is the sum of the pattern databases of a partition of
+    the tiles. Patterns are given with the tiles of the standard goal
+    board; if the goal has other labels, the pattern is made of the
+    tiles found at the same goal positions. The blank must be at the
+    last position of the goal board.
+
+    After a move only the database of the pattern of the moved tile
+    changes, so the value is updated from the parent without looking
+    up the other patterns.
+
+    A pattern and its `transposed_pattern` share a single database,
+    the one of the pattern with the lowest sorted tiles: the other one
+    looks it up with the transposed positions of its tiles, which is
+    the same sub-problem reflected about the diagonal.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        goal: bytes,
+        partition: Optional[Sequence[Sequence[int]]] = None,
+    ) -> None:
+        super().__init__(n, goal)
+        if goal[-1] != 0:
+            raise ValueError("The blank must be at the last position of the goal")
+        if partition is None:
+            if n not in DEFAULT_PARTITIONS:
+                raise ValueError(f"No default partition for n = {n}")
+            partition = DEFAULT_PARTITIONS[n]
+        identity = tuple(range(n * n))
+        self.databases: List[PatternDatabase] = []
+        # Tiles of every pattern in the order of the slots of its
+        # database, and the position where the database reads each cell
+        self.groups: List[Tuple[int, ...]] = []
+        self.positions: List[Tuple[int, ...]] = []
+        for tiles in partition:
+            mirror = transposed_pattern(n, tiles)
+            if sorted(mirror) < sorted(tiles):
+                # Read the database of the transposed pattern, whose
+                # tiles are transposed back to the ones of the pattern
+                tiles = tuple(sorted(mirror))
+                mirror = transposed_pattern(n, tiles)
+                positions = transposed_positions(n)
+            else:
+                mirror, positions = tuple(tiles), identity
+            self.databases.append(PatternDatabase.load(n, tiles))
+            self.groups.append(tuple(goal[tile - 1] for tile in mirror))
+            self.positions.append(positions)
+        # For each tile, the index of its pattern and the weight of
+        # its position in the index of the pattern
+        self.slots: Dict[int, Tuple[int, int]] = {}
+        for index, group in enumerate(self.groups):
+            for slot, tile in enumerate(group):
+                self.slots[tile] = (index, (n * n) ** slot)
+
+    def _index(self, board: bytes, group: int) -> int:
+        positions = self.positions[group]
+        index = 0
+        radix = 1
+        for tile in self.groups[group]:
+            index += positions[board.index(tile)] * radix
+            radix *= self.n * self.n
+        return index
+
+    def __call__(self, board: bytes) -> int:
+        return sum(
+            database[self._index(board, group)]
+            for group, database in enumerate(self.databases)
+        )
+
+    def update(self, h: int, board: bytes, tile: int, src: int, dst: int) -> int:
+        if tile not in self.slots:
+            return h
+        group, radix = self.slots[tile]
+        database = self.databases[group]
+        index = self._index(board, group)
+        positions = self.positions[group]
+        moved = (positions[dst] - positions[src]) * radix
+        return h - database[index - moved] + database[index]
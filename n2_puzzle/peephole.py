@@ -0,0 +1,171 @@
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from n2_puzzle.puzzle import OPPOSITE, Direction
+
+# Change of the (row, column) position of the blank for every move
+OFFSETS = {
+    Direction.UP: (-1, 0),
+    Direction.DOWN: (1, 0),
+    Direction.LEFT: (0, -1),
+    Direction.RIGHT: (0, 1),
+}
+
+# Moves replaced at once by `optimize_plan`. Longer windows find a few
+# more shortcuts but their table takes much longer to build.
+WINDOW = 8
+
+Cell = Tuple[int, int]
+Effect = Tuple[Cell, Tuple[Tuple[Cell, Cell], ...]]
+
+
+def cancel_inverses(plan: Sequence[Direction]) -> List[Direction]:
+    """Remove the moves that are immediately undone, such as LEFT, RIGHT.
+
+    Removing a pair can make the moves around it cancel too, so the plan
+    is scanned with a stack and comes out without any inverse pair.
+    """
+    result: List[Direction] = []
+    for action in plan:
+        if result and result[-1] == OPPOSITE[action]:
+            result.pop()
+        else:
+            result.append(action)
+    return result
+
+
+def effect(plan: Sequence[Direction]) -> Effect:
+    """What a plan does to any board, relative to the starting blank.
+
+    Tiles are identified by the cell they start on, so the effect is the
+    final cell of the blank and the tiles that end up somewhere else.
+    Two plans with the same effect turn any board into the same board,
+    as long as both stay inside it.
+    """
+    blank = (0, 0)
+    moved: Dict[Cell, Cell] = {}
+    for action in plan:
+        di, dj = OFFSETS[action]
+        pos = (blank[0] + di, blank[1] + dj)
+        tile = moved.pop(pos, pos)
+        if tile != blank:
+            moved[blank] = tile
+        blank = pos
+    return blank, tuple(sorted(moved.items()))
+
+
+@lru_cache(maxsize=None)
+def shortest_plans(depth: int) -> Dict[Effect, Tuple[Direction, ...]]:
+    """Shortest plan of every effect reachable in at most `depth` moves.
+
+    Plans are found by a BFS from the empty plan, so the plan stored for
+    an effect is a shortest one.
+    """
+    plans: Dict[Effect, Tuple[Direction, ...]] = {effect(()): ()}
+    queue: Deque[Tuple[Direction, ...]] = deque([()])
+    while queue:
+        plan = queue.popleft()
+        if len(plan) == depth:
+            continue
+        for action in Direction:
+            if plan and plan[-1] == OPPOSITE[action]:
+                continue
+            child = plan + (action,)
+            key = effect(child)
+            if key not in plans:
+                plans[key] = child
+                queue.append(child)
+    return plans
+
+
+@lru_cache(maxsize=None)
+def shortcut_table(window: int) -> Dict[Tuple[Direction, ...], Tuple[Direction, ...]]:
+    """Shortest equivalent of every plan of `window` moves that has one.
+
+    Only plans without inverse pairs are listed, as those are removed
+    before looking for shortcuts.
+    """
+    shortest = shortest_plans(window - 1)
+    table = {}
+    plans: List[Tuple[Direction, ...]] = [()]
+    for _ in range(window):
+        plans = [
+            plan + (action,)
+            for plan in plans
+            for action in Direction
+            if not plan or plan[-1] != OPPOSITE[action]
+        ]
+    for plan in plans:
+        shortcut = shortest.get(effect(plan))
+        if shortcut is not None:
+            table[plan] = shortcut
+    return table
+
+
+def _code(plan: Sequence[Direction]) -> int:
+    code = 0
+    for action in plan:
+        code = code << 2 | action.value
+    return code
+
+
+def _end(n: int, blank: int, plan: Sequence[Direction]) -> Optional[int]:
+    """Flat position of the blank after the plan, or None if it leaves
+    the board"""
+    i, j = divmod(blank, n)
+    for action in plan:
+        di, dj = OFFSETS[action]
+        i += di
+        j += dj
+        if not (0 <= i < n and 0 <= j < n):
+            return None
+    return i * n + j
+
+
+def optimize_plan(
+    plan: Sequence[Direction], n: int, blank: int, window: int = WINDOW
+) -> List[Direction]:
+    """Shorten a plan without changing the board it leads to.
+
+    `n` is the dimension of the board and `blank` the flat position of
+    the blank before the plan. Inverse pairs are cancelled and every
+    `window` consecutive moves are replaced by their shortest equivalent
+    from `shortcut_table`, when it stays inside the board. Replacements
+    are fed back through the optimizer, since they can create new inverse
+    pairs and shortcuts with the moves around them.
+    """
+    # Windows are looked up by a rolling code of 2 bits per move
+    mask = (1 << 2 * window) - 1
+    table = {_code(key): value for key, value in shortcut_table(window).items()}
+    result: List[Direction] = []
+    # Position of the blank before each move of the result, and code of
+    # the last moves of the result after it
+    blanks: List[int] = []
+    codes = [0]
+    pending = list(reversed(plan))
+    while pending:
+        action = pending.pop()
+        if result and result[-1] == OPPOSITE[action]:
+            result.pop()
+            codes.pop()
+            blank = blanks.pop()
+            continue
+        blanks.append(blank)
+        result.append(action)
+        code = (codes[-1] << 2 | action.value) & mask
+        codes.append(code)
+        di, dj = OFFSETS[action]
+        blank += di * n + dj
+        if len(result) < window or code not in table:
+            continue
+        shortcut = table[code]
+        start = blanks[-window]
+        if _end(n, start, shortcut) is None:
+            continue
+        del result[-window:]
+        del blanks[-window:]
+        del codes[-window:]
+        blank = start
+        pending.extend(reversed(shortcut))
+    return result
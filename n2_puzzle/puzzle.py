@@ -1,6 +1,9 @@
+import math
+import sys
 import time
+from array import array
 from enum import Enum
-from typing import Dict, List, Tuple
+from typing import Iterable, Iterator, List, Mapping, Optional, TextIO, Tuple
 
 
 class bcolors:
@@ -22,6 +25,23 @@ class Direction(Enum):
     RIGHT = 3
 
 
+OPPOSITE = {
+    Direction.UP: Direction.DOWN,
+    Direction.DOWN: Direction.UP,
+    Direction.LEFT: Direction.RIGHT,
+    Direction.RIGHT: Direction.LEFT,
+}
+
+# Move that does on the board reflected about its diagonal, where rows
+# and columns are swapped, what a move does on the board
+TRANSPOSED = {
+    Direction.UP: Direction.LEFT,
+    Direction.LEFT: Direction.UP,
+    Direction.DOWN: Direction.RIGHT,
+    Direction.RIGHT: Direction.DOWN,
+}
+
+
 def generate_template_board(n, is_goal: bool = False):
     """Generate a board with the worst case given a dimension n.
 
@@ -74,7 +94,47 @@ def generate_template_board(n, is_goal: bool = False):
     return board
 
 
+def array_typecode(cells: int) -> str:
+    """Smallest unsigned array type code that holds every tile of a board"""
+    return "H" if cells <= 1 << 16 else "L"
+
+
+class TilePositions(Mapping[int, Tuple[int, int]]):
+    """Read-only `(row, column)` view of the tile positions of a puzzle"""
+
+    def __init__(self, puzzle: "NPuzzle") -> None:
+        self._puzzle = puzzle
+
+    def __getitem__(self, tile: int) -> Tuple[int, int]:
+        puzzle = self._puzzle
+        if not 0 <= tile < len(puzzle.positions):
+            raise KeyError(tile)
+        pos = puzzle.positions[tile]
+        if puzzle.cells[pos] != tile:
+            raise KeyError(tile)
+        return divmod(pos, puzzle.n)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self._puzzle.cells))
+
+    def __len__(self) -> int:
+        return len(self._puzzle.cells)
+
+
 class NPuzzle:
+    """Sliding puzzle board.
+
+    The tiles are stored row by row in the flat typed array `cells`,
+    and `positions` holds the flat position of every tile, so a move
+    only rewrites two entries of each array and allocates nothing.
+    `board` and `tile_pos` give the row and column view of them.
+
+    Tiles can have any distinct non-negative labels, 0 being the blank,
+    as on the sub-boards cut out of a larger board. `positions` then
+    has an entry for every label up to the largest one, and only the
+    entries of the tiles on the board are meaningful.
+    """
+
     def __init__(self, board: List[List[int]], is_goal: bool = False) -> None:
         # Simple assertions to make sure the board is "valid"
         assert len(board) > 0
@@ -82,13 +142,22 @@ class NPuzzle:
         assert len(board) == len(board[0])
         assert all(len(row) == len(board[0]) for row in board)
 
-        self.board = board
         n = len(board)
         self.n = n
-        self.tile_pos: Dict[int, Tuple[int, int]] = {}
-        for i in range(n):
-            for j in range(n):
-                self.tile_pos[board[i][j]] = (i, j)
+        tiles = [tile for row in board for tile in row]
+        labels = max(n * n, max(tiles) + 1)
+        typecode = array_typecode(labels)
+        self.cells = array(typecode, tiles)
+        self.positions = array(typecode, [0]) * labels
+        for pos, tile in enumerate(self.cells):
+            self.positions[tile] = pos
+        self.tile_pos = TilePositions(self)
+
+    @property
+    def board(self) -> List[List[int]]:
+        """Copy of the board as a list of rows"""
+        n = self.n
+        return [self.cells[i * n : (i + 1) * n].tolist() for i in range(n)]
 
     def move(self, dir: Direction) -> bool:
         """Move the blank tile given a direction
@@ -98,24 +167,29 @@ class NPuzzle:
         is moved to the old position. If the move is invalid,
         the board is unchanged and this method returns False.
         """
-        (zero_i, zero_j) = self.tile_pos[0]
-        if dir == Direction.UP:
-            i, j = zero_i - 1, zero_j
-        elif dir == Direction.DOWN:
-            i, j = zero_i + 1, zero_j
-        elif dir == Direction.LEFT:
-            i, j = zero_i, zero_j - 1
+        n = self.n
+        blank = self.positions[0]
+        if dir is Direction.UP:
+            if blank < n:
+                return False
+            pos = blank - n
+        elif dir is Direction.DOWN:
+            pos = blank + n
+            if pos >= n * n:
+                return False
+        elif dir is Direction.LEFT:
+            if blank % n == 0:
+                return False
+            pos = blank - 1
         else:
-            i, j = zero_i, zero_j + 1
-        if i < 0 or i >= self.n or j < 0 or j >= self.n:
-            return False
-        tile = self.board[i][j]
-        self.tile_pos[0] = (i, j)
-        self.tile_pos[tile] = (zero_i, zero_j)
-        self.board[i][j], self.board[zero_i][zero_j] = (
-            self.board[zero_i][zero_j],
-            self.board[i][j],
-        )
+            if blank % n == n - 1:
+                return False
+            pos = blank + 1
+        tile = self.cells[pos]
+        self.cells[blank] = tile
+        self.cells[pos] = 0
+        self.positions[tile] = blank
+        self.positions[0] = pos
         return True
 
     def __str__(self) -> str:
@@ -140,45 +214,159 @@ class NPuzzle:
 
     def __hash__(self) -> int:
         """Hash function for the board"""
-        return hash(str(self))
+        return hash(self.cells.tobytes())
 
     def __eq__(self, other: object) -> bool:
         """Equality function for the board"""
         if not isinstance(other, NPuzzle):
             raise NotImplementedError("Other object must be an NPuzzle object")
-        return all(row1 == row2 for row1, row2 in zip(self.board, other.board))
+        return self.cells == other.cells
+
+
+def _cell_text(tile: int, pos: int) -> str:
+    """Three characters of a cell, tiles in their goal cell in green"""
+    if not tile:
+        return "   "
+    if tile == pos + 1:
+        return f"{bcolors.OKGREEN}{tile: >3}{bcolors.ENDC}"
+    return f"{tile: >3}"
+
+
+def board_text(puzzle: "NPuzzle") -> str:
+    """The bordered board drawn by `draw_puzzle`"""
+    n = puzzle.n
+    line = "----" * n + "-\n"
+    parts = [line]
+    for i in range(n):
+        parts.append("|")
+        for pos in range(i * n, (i + 1) * n):
+            parts.append(_cell_text(puzzle.cells[pos], pos))
+            parts.append("|")
+        parts.append("\n")
+        parts.append(line)
+    return "".join(parts)
 
 
 def draw_puzzle(puzzle) -> None:
-    s = ""
-    line = "----" * puzzle.n + "-\n"
-    s += line
-    for row in puzzle.board:
-        s += "|"
-        for col in row:
-            if col:
-                i, j = puzzle.tile_pos[col]
-                array_index = i * puzzle.n + j
-                if col == array_index + 1:
-                    col_str = f"{bcolors.OKGREEN}{col: >3}{bcolors.ENDC}"
-                else:
-                    col_str = f"{col: >3}"
-                s += col_str + "|"
-            else:
-                s += f"{' ': >3}" + "|"
-        s += "\n" + line
-    print(s)
+    print(board_text(puzzle))
 
 
 def clear_output():
     print("\033c", end="")
 
 
-def animate_plan(puzzle, plan):
-    clear_output()
-    draw_puzzle(puzzle)
+def apply_plan(puzzle: NPuzzle, plan: List[Direction], moves: List[Direction]) -> None:
+    """Apply a plan to the puzzle without drawing it.
+
+    Every action that actually moves the blank tile is appended
+    to `moves`, so the recorded moves can be replayed later on
+    a copy of the original board (for example with `animate_plan`).
+    """
     for action in plan:
-        clear_output()
-        time.sleep(0.1)
-        puzzle.move(action)
-        draw_puzzle(puzzle)
+        if puzzle.move(action):
+            moves.append(action)
+
+
+class TerminalRenderer:
+    """Draw a puzzle on the terminal and animate plans on it.
+
+    The board is drawn once at the top of the screen, and then every
+    frame only rewrites the cells that changed since the previous one,
+    moving the cursor to them with ANSI escape codes. A frame of a
+    single move rewrites two cells, whatever the size of the board.
+
+    Frames are `delay` seconds apart. With `duration`, plans that would
+    take longer than `duration` seconds skip frames, applying several
+    moves per frame, so that they take about `duration` seconds.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO = sys.stdout,
+        delay: float = 0.1,
+        duration: Optional[float] = None,
+    ) -> None:
+        self.stream = stream
+        self.delay = delay
+        self.duration = duration
+
+    def draw(self, puzzle: "NPuzzle") -> None:
+        """Clear the screen and draw the whole board"""
+        self.stream.write("\033[H\033[2J" + board_text(puzzle))
+        self.stream.flush()
+
+    def redraw(self, puzzle: "NPuzzle", cells: Iterable[int]) -> None:
+        """Rewrite the cells at the given flat positions"""
+        n = puzzle.n
+        parts = []
+        for pos in cells:
+            i, j = divmod(pos, n)
+            parts.append(f"\033[{2 * i + 2};{4 * j + 2}H")
+            parts.append(_cell_text(puzzle.cells[pos], pos))
+        # Leave the cursor below the board
+        parts.append(f"\033[{2 * n + 2};1H")
+        self.stream.write("".join(parts))
+        self.stream.flush()
+
+    def moves_per_frame(self, moves: int) -> int:
+        if self.duration is None or self.delay <= 0:
+            return 1
+        frames = max(1, int(self.duration / self.delay))
+        return max(1, math.ceil(moves / frames))
+
+    def animate(self, puzzle: "NPuzzle", plan: List[Direction]) -> None:
+        """Apply the plan to the puzzle, drawing every frame"""
+        self.draw(puzzle)
+        step = self.moves_per_frame(len(plan))
+        changed = set()
+        next_frame = time.perf_counter()
+        for count, action in enumerate(plan, 1):
+            blank = puzzle.positions[0]
+            if puzzle.move(action):
+                changed.add(blank)
+                changed.add(puzzle.positions[0])
+            if count % step and count < len(plan):
+                continue
+            # Frames are scheduled from the start, so the time spent
+            # drawing doesn't add up
+            next_frame += self.delay
+            pause = next_frame - time.perf_counter()
+            if pause > 0:
+                time.sleep(pause)
+            self.redraw(puzzle, changed)
+            changed.clear()
+
+
+class NullRenderer(TerminalRenderer):
+    """Renderer that draws nothing, for headless runs.
+
+    Plans are applied to the puzzle right away, without waiting.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(delay=0)
+
+    def draw(self, puzzle: "NPuzzle") -> None:
+        pass
+
+    def redraw(self, puzzle: "NPuzzle", cells: Iterable[int]) -> None:
+        pass
+
+    def animate(self, puzzle: "NPuzzle", plan: List[Direction]) -> None:
+        for action in plan:
+            puzzle.move(action)
+
+
+def animate_plan(
+    puzzle: NPuzzle,
+    plan: List[Direction],
+    renderer: Optional[TerminalRenderer] = None,
+) -> None:
+    """Apply the plan to the puzzle, drawing it move by move.
+
+    By default it is drawn on the terminal with a `TerminalRenderer`,
+    at 10 moves per second.
+    """
+    if renderer is None:
+        renderer = TerminalRenderer()
+    renderer.animate(puzzle, plan)
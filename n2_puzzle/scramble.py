@@ -0,0 +1,152 @@
+import random
+from typing import Any, Iterator, List, Optional
+
+from n2_puzzle.puzzle import OPPOSITE, Direction, NPuzzle, generate_template_board
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+
+def permutation_parity(tiles: List[int]) -> int:
+    """Parity of the number of inversions of the tiles, ignoring the blank.
+
+    The parity is computed by counting the cycles of the permutation,
+    so it takes O(n * n) time instead of comparing every pair of tiles.
+    """
+    order = sorted(tile for tile in tiles if tile)
+    rank = {tile: index for index, tile in enumerate(order)}
+    permutation = [rank[tile] for tile in tiles if tile]
+    seen = [False] * len(permutation)
+    cycles = 0
+    for start in range(len(permutation)):
+        if not seen[start]:
+            cycles += 1
+            i = start
+            while not seen[i]:
+                seen[i] = True
+                i = permutation[i]
+    return (len(permutation) - cycles) % 2
+
+
+def is_solvable(board: List[List[int]]) -> bool:
+    """Check if the board can reach the goal of `generate_template_board`.
+
+    Moving the blank horizontally doesn't change the order of the tiles,
+    and moving it vertically jumps a tile over n - 1 others. So for odd
+    n the parity of the inversions is invariant, and for even n it flips
+    with every row the blank moves, which gives the classic criterion:
+    the inversions plus the rows between the blank and the last row
+    must be even.
+    """
+    n = len(board)
+    tiles = [tile for row in board for tile in row]
+    blank_row = tiles.index(0) // n
+    parity = permutation_parity(tiles)
+    if n % 2 == 0:
+        parity += n - 1 - blank_row
+    return parity % 2 == 0
+
+
+def _fix_parity(tiles: List[int]) -> None:
+    """Swap the first two tiles that are not the blank.
+
+    The swap flips the parity of the board without moving the blank,
+    so it maps the unsolvable boards one to one onto the solvable ones.
+    """
+    first, second = [i for i in range(3) if tiles[i]][:2]
+    tiles[first], tiles[second] = tiles[second], tiles[first]
+
+
+def random_boards(
+    n: int, count: Optional[int] = None, seed: Optional[int] = None
+) -> Iterator[List[List[int]]]:
+    """Generate uniformly random solvable boards.
+
+    Boards are generated one at a time, so memory stays flat however
+    many are requested. `count=None` generates boards forever. The same
+    `seed` always gives the same sequence of boards.
+    """
+    rng = random.Random(seed)
+    tiles = list(range(n * n))
+    generated = 0
+    while count is None or generated < count:
+        rng.shuffle(tiles)
+        board = [tiles[i * n : (i + 1) * n] for i in range(n)]
+        if not is_solvable(board):
+            _fix_parity(tiles)
+            board = [tiles[i * n : (i + 1) * n] for i in range(n)]
+        yield board
+        generated += 1
+
+
+def random_walk_boards(
+    n: int, depth: int, count: Optional[int] = None, seed: Optional[int] = None
+) -> Iterator[List[List[int]]]:
+    """Generate boards by walking the blank `depth` moves from the goal.
+
+    The walk never undoes its previous move, so shallow walks give
+    boards close to the goal and deep walks approach random boards.
+    Boards are generated lazily and are always solvable.
+    """
+    rng = random.Random(seed)
+    directions = list(Direction)
+    generated = 0
+    while count is None or generated < count:
+        puzzle = NPuzzle(generate_template_board(n, is_goal=True))
+        last = None
+        moved = 0
+        while moved < depth:
+            action = rng.choice(directions)
+            if last is not None and action == OPPOSITE[last]:
+                continue
+            if puzzle.move(action):
+                last = action
+                moved += 1
+        yield puzzle.board
+        generated += 1
+
+
+def random_boards_array(
+    n: int,
+    count: int,
+    seed: Optional[int] = None,
+    batch_size: int = 100_000,
+) -> Iterator[Any]:
+    """Generate uniformly random solvable boards with NumPy.
+
+    Yields arrays of shape `(batch, n * n)`, each row a board written
+    row by row, with at most `batch_size` boards per array, so millions
+    of boards can be streamed with bounded memory. The parity of the
+    boards is computed for the whole batch at once and the unsolvable
+    ones are fixed with the same swap used by `random_boards`.
+
+    NumPy is an optional dependency, only needed by this function.
+    """
+    if np is None:
+        raise ImportError("random_boards_array requires numpy")
+    rng = np.random.default_rng(seed)
+    cells = n * n
+    generated = 0
+    while generated < count:
+        size = min(batch_size, count - generated)
+        boards = rng.permuted(np.tile(np.arange(cells), (size, 1)), axis=1)
+        blank = np.argmax(boards == 0, axis=1)
+        inversions = np.zeros(size, dtype=np.int64)
+        for i in range(cells - 1):
+            inversions += np.sum(boards[:, i : i + 1] > boards[:, i + 1 :], axis=1)
+        # The blank is smaller than every tile, so it adds an inversion
+        # for every tile on its left
+        parity = inversions - blank
+        if n % 2 == 0:
+            parity += n - 1 - blank // n
+        unsolvable = np.nonzero(parity % 2)[0]
+        first = np.where(blank[unsolvable] == 0, 1, 0)
+        second = np.where(blank[unsolvable] <= 1, 2, 1)
+        boards[unsolvable, first], boards[unsolvable, second] = (
+            boards[unsolvable, second],
+            boards[unsolvable, first],
+        )
+        yield boards
+        generated += size
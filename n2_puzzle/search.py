@@ -1,7 +1,48 @@
-from typing import List, Optional
+import heapq
+import itertools
+import math
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple, Union
 
-from n2_puzzle.puzzle import Direction, NPuzzle
-from n2_puzzle.utils import PriorityQueue
+from n2_puzzle.cache import PlanCache
+from n2_puzzle.heuristics import (
+    BatchHeuristic,
+    Heuristic,
+    resolve_batch_heuristic,
+    resolve_heuristic,
+)
+from n2_puzzle.puzzle import OPPOSITE, Direction, NPuzzle
+from n2_puzzle.utils import BucketOpenList, OpenList
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+
+@dataclass
+class SearchStats:
+    """Counters filled by the search engines.
+
+    `duplicates` counts the successors dropped because their board was
+    already reached (for IDA*, the transposition table hits), `max_open`
+    is the peak size of the open lists (for IDA*, the deepest path) and
+    `visited` the number of boards closed when the search ends (for
+    IDA*, the entries of the transposition table).
+    """
+
+    expanded: int = 0
+    generated: int = 0
+    duplicates: int = 0
+    max_open: int = 0
+    visited: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
 
 
 class State:
@@ -38,17 +79,176 @@ class State:
         return hash(self.puzzle)
 
 
+@lru_cache(maxsize=None)
+def blank_moves(n: int) -> Tuple[Tuple[Tuple[Direction, int], ...], ...]:
+    """Legal moves of the blank tile for every position of an n x n board.
+
+    The i-th entry holds the `(direction, new_position)` pairs that are
+    valid when the blank is at the flat position i.
+    """
+    moves = []
+    for pos in range(n * n):
+        i, j = divmod(pos, n)
+        pos_moves = []
+        if i > 0:
+            pos_moves.append((Direction.UP, pos - n))
+        if i < n - 1:
+            pos_moves.append((Direction.DOWN, pos + n))
+        if j > 0:
+            pos_moves.append((Direction.LEFT, pos - 1))
+        if j < n - 1:
+            pos_moves.append((Direction.RIGHT, pos + 1))
+        moves.append(tuple(pos_moves))
+    return tuple(moves)
+
+
+class PackedState:
+    """Compact search state.
+
+    The board is stored row by row as `bytes`, one byte per tile, so
+    it only supports boards with up to 256 cells. Successors are built
+    by swapping the blank with one of its neighbors in a copy of the
+    parent board, and equality and hashing work directly on the packed
+    bytes instead of rendering the board.
+
+    `h` caches the heuristic value of the state, so successors can
+    update it incrementally instead of evaluating the whole board.
+    """
+
+    __slots__ = ("board", "n", "blank", "action", "parent", "depth", "h")
+
+    def __init__(
+        self,
+        board: bytes,
+        n: int,
+        blank: int,
+        action: Optional[Direction] = None,
+        parent: Optional["PackedState"] = None,
+        depth: int = 0,
+        h: int = 0,
+    ):
+        self.board = board
+        self.n = n
+        self.blank = blank
+        self.action = action
+        self.parent = parent
+        self.depth = depth
+        self.h = h
+
+    @classmethod
+    def from_puzzle(cls, puzzle: NPuzzle) -> "PackedState":
+        board = bytes(tile for row in puzzle.board for tile in row)
+        return cls(board, puzzle.n, board.index(0))
+
+    def to_puzzle(self) -> NPuzzle:
+        n = self.n
+        return NPuzzle([list(self.board[i * n : (i + 1) * n]) for i in range(n)])
+
+    def neighbors(self, heuristic: Optional[Heuristic] = None) -> List["PackedState"]:
+        """Generate the successors of the state.
+
+        If a `heuristic` is given, the successors carry their heuristic
+        value, updated from the value `h` of this state. Only the tile
+        swapped with the blank moves, so heuristics such as Manhattan
+        distance update it in O(1).
+        """
+        neighbors = []
+        blank = self.blank
+        h = self.h
+        for dir, pos in blank_moves(self.n)[blank]:
+            board = bytearray(self.board)
+            tile = board[pos]
+            board[blank] = tile
+            board[pos] = 0
+            child = bytes(board)
+            child_h = 0
+            if heuristic is not None:
+                child_h = heuristic.update(h, child, tile, pos, blank)
+            neighbors.append(
+                PackedState(child, self.n, pos, dir, self, self.depth + 1, child_h)
+            )
+        return neighbors
+
+    def __repr__(self) -> str:
+        return repr(self.to_puzzle())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackedState):
+            raise NotImplementedError("Other object must be a PackedState object")
+        return self.board == other.board
+
+    def __hash__(self) -> int:
+        return hash(self.board)
+
+
+def expand_batch(
+    states: List[PackedState], heuristic: BatchHeuristic
+) -> List[PackedState]:
+    """Generate the successors of many states at once.
+
+    Same as calling `PackedState.neighbors` on every state, but the
+    boards of the successors are built as rows of a NumPy matrix, by
+    copying the board of their parent and swapping the blank, and are
+    scored with a single call to `heuristic.evaluate`.
+    """
+    n = states[0].n
+    size = n * n
+    moves = blank_moves(n)
+    parents = []
+    blanks = []
+    targets = []
+    actions = []
+    for index, state in enumerate(states):
+        for action, pos in moves[state.blank]:
+            parents.append(index)
+            blanks.append(state.blank)
+            targets.append(pos)
+            actions.append(action)
+    boards = np.frombuffer(b"".join(state.board for state in states), np.uint8)
+    children = boards.reshape(len(states), size)[parents]
+    rows = np.arange(len(parents))
+    children[rows, blanks] = children[rows, targets]
+    children[rows, targets] = 0
+    values = heuristic.evaluate(children).tolist()
+    data = children.tobytes()
+    neighbors = []
+    for k, index in enumerate(parents):
+        parent = states[index]
+        neighbors.append(
+            PackedState(
+                data[k * size : (k + 1) * size],
+                n,
+                targets[k],
+                actions[k],
+                parent,
+                parent.depth + 1,
+                values[k],
+            )
+        )
+    return neighbors
+
+
+def pack(state: Union[State, PackedState]) -> PackedState:
+    """Return the packed version of a search state"""
+    if isinstance(state, PackedState):
+        return state
+    return PackedState.from_puzzle(state.puzzle)
+
+
 def manhattan_distance(s1: State, s2: State) -> int:
     """Manhattan distance heuristic.
 
     Given s1 and s2, return the Manhattan distance between them.
     In this case if i1, j1 are coordinates of s1 and i2, j2 are
     coordinates of s2, the manhattan distance is computed by
-    `abs(i1 - i2) + abs(j1 - j2)`.
+    `abs(i1 - i2) + abs(j1 - j2)`. The blank tile is not taken
+    into account, so the heuristic is admissible.
     """
     distance = 0
     for row in s1.puzzle.board:
         for tile in row:
+            if not tile:
+                continue
             i1, j1 = s1.puzzle.tile_pos[tile]
             i2, j2 = s2.puzzle.tile_pos[tile]
             distance += abs(i1 - i2) + abs(j1 - j2)
@@ -56,32 +256,631 @@ def manhattan_distance(s1: State, s2: State) -> int:
     return distance
 
 
-def a_star_puzzle(init_state, goal_state) -> List[Direction]:
+def a_star_puzzle(
+    init_state: Union[State, PackedState],
+    goal_state: Union[State, PackedState],
+    heuristic: Optional[Union[Heuristic, str]] = None,
+    stats: Optional[SearchStats] = None,
+    bidirectional: bool = False,
+    buckets: bool = False,
+    batch_size: int = 0,
+    max_nodes: int = 0,
+    max_bytes: int = 0,
+    cache: Optional[PlanCache] = None,
+) -> List[Direction]:
     """A* search algorithm for the 8-puzzle problem.
 
     In theory it supports any size of the board,
     but in practice it only works for 3x3 boards. The reason
     being that the search space increases exponentially with the size
     of the board.
+
+    The search runs on `PackedState`s, `State`s are packed before
+    starting the search. The open list keeps the best depth found for
+    every board and skips the entries made stale by a shorter path, and
+    boards are closed when popped, so each board is expanded at most
+    once. The heuristic value of every successor is updated
+    incrementally from the one of its parent. Any `Heuristic`
+    built for the goal state can be plugged in, or selected by its name
+    in `HEURISTICS`. Manhattan distance is used by default. If `stats`
+    is given, the search counts the nodes it expands and generates in
+    it.
+
+    With `buckets`, the open list is a `BucketOpenList`, which is faster
+    but needs the heuristic to return non-negative integers. With
+    `bidirectional`, the plan is searched from both ends at once with
+    `bidirectional_search`. With `batch_size`, the states are expanded
+    in batches with NumPy by `batched_a_star`. With `max_nodes` or
+    `max_bytes`, the search holds at most that many nodes or bytes with
+    `memory_bounded_a_star`.
+
+    With `cache`, optimal plans are looked up in the `PlanCache` before
+    searching and stored in it afterwards.
     """
-    queue = PriorityQueue()
-    queue.push(
-        init_state, manhattan_distance(init_state, goal_state) + init_state.depth
-    )
-    visited = set()
+    if stats is None:
+        stats = SearchStats()
+    init_state = pack(init_state)
+    goal_state = pack(goal_state)
+    if cache is not None:
+        cached = cache.get("a_star", init_state.board, goal_state.board)
+        if cached is not None:
+            return cached
+        searched = a_star_puzzle(
+            init_state,
+            goal_state,
+            heuristic,
+            stats,
+            bidirectional,
+            buckets,
+            batch_size,
+            max_nodes,
+            max_bytes,
+        )
+        # An empty plan may only mean that the memory bound was hit
+        if searched or init_state.board == goal_state.board:
+            cache.put("a_star", init_state.board, goal_state.board, searched)
+        return searched
+    if max_nodes or max_bytes:
+        return memory_bounded_a_star(
+            init_state, goal_state, heuristic, stats, max_nodes, max_bytes
+        )
+    if batch_size:
+        return batched_a_star(init_state, goal_state, heuristic, stats, batch_size)
+    heuristic = resolve_heuristic(heuristic, goal_state.n, goal_state.board)
+    if bidirectional:
+        return bidirectional_search(init_state, goal_state, heuristic, stats=stats)
+    init_state.h = heuristic(init_state.board)
+    queue = BucketOpenList() if buckets else OpenList()
+    queue.push(init_state, init_state.h, init_state.board, 0)
+    closed = set()
     plan: List[Direction] = []
     while not queue.isEmpty():
         state = queue.pop()
-        visited.add(state)
+        closed.add(state.board)
         if state == goal_state:
             while state:
                 if state.action:
-                    plan.insert(0, state.action)
+                    plan.append(state.action)
                 state = state.parent
+            plan.reverse()
             break
-        for neighbor in state.neighbors():
-            if neighbor not in visited:
-                queue.push(
-                    neighbor, manhattan_distance(neighbor, goal_state) + neighbor.depth
-                )
+        stats.expanded += 1
+        for neighbor in state.neighbors(heuristic):
+            if neighbor.board in closed or not queue.push(
+                neighbor, neighbor.h + neighbor.depth, neighbor.board, neighbor.depth
+            ):
+                stats.duplicates += 1
+                continue
+            stats.generated += 1
+        stats.max_open = max(stats.max_open, len(queue))
+    stats.visited = len(closed)
+    return plan
+
+
+def batched_a_star(
+    init_state: Union[State, PackedState],
+    goal_state: Union[State, PackedState],
+    heuristic: Optional[Union[Heuristic, str]] = None,
+    stats: Optional[SearchStats] = None,
+    batch_size: int = 64,
+) -> List[Direction]:
+    """A* search that expands up to `batch_size` states at once.
+
+    The states popped together all have the lowest f-value of the open
+    list, so none of them can be reached by a shorter path through the
+    others, and the plan is still optimal. Their successors are built
+    and scored together by `expand_batch`, which pays the Python
+    overhead of the heuristic once per batch. The heuristic must be a
+    `BatchHeuristic`, or the name of one in `BATCH_HEURISTICS`,
+    Manhattan distance by default. Other heuristics raise a
+    `ValueError`.
+    """
+    if stats is None:
+        stats = SearchStats()
+    init_state = pack(init_state)
+    goal_state = pack(goal_state)
+    heuristic = resolve_batch_heuristic(heuristic, goal_state.n, goal_state.board)
+    init_state.h = heuristic(init_state.board)
+    queue = OpenList()
+    queue.push(init_state, init_state.h, init_state.board, 0)
+    closed = set()
+    plan: List[Direction] = []
+    while not queue.isEmpty():
+        f = queue.peek()
+        states: List[PackedState] = []
+        while len(states) < batch_size and not queue.isEmpty() and queue.peek() == f:
+            state = queue.pop()
+            closed.add(state.board)
+            if state == goal_state:
+                while state:
+                    if state.action:
+                        plan.append(state.action)
+                    state = state.parent
+                plan.reverse()
+                stats.visited = len(closed)
+                return plan
+            states.append(state)
+        stats.expanded += len(states)
+        for neighbor in expand_batch(states, heuristic):
+            if neighbor.board in closed or not queue.push(
+                neighbor, neighbor.h + neighbor.depth, neighbor.board, neighbor.depth
+            ):
+                stats.duplicates += 1
+                continue
+            stats.generated += 1
+        stats.max_open = max(stats.max_open, len(queue))
+    stats.visited = len(closed)
     return plan
+
+
+def anytime_a_star(
+    init_state: Union[State, PackedState],
+    goal_state: Union[State, PackedState],
+    heuristic: Optional[Union[Heuristic, str]] = None,
+    stats: Optional[SearchStats] = None,
+    epsilon: float = 1.0,
+    time_budget: Optional[float] = None,
+) -> List[Direction]:
+    """Anytime weighted A* search.
+
+    Nodes are expanded in order of `g + epsilon * h`, so with an
+    admissible heuristic the first plan found is at most `epsilon`
+    times longer than an optimal one, and is usually found much sooner
+    than with A* (`epsilon = 1`). Boards reached again by a shorter
+    path are reopened.
+
+    Without `time_budget` the first plan is returned. Otherwise the
+    search goes on improving it, pruning the nodes that can't lead to
+    a shorter plan, until `time_budget` seconds have passed or no node
+    is left, which proves the plan optimal. If no plan is found within
+    the budget, an empty plan is returned.
+    """
+    if stats is None:
+        stats = SearchStats()
+    init_state = pack(init_state)
+    goal_state = pack(goal_state)
+    heuristic = resolve_heuristic(heuristic, goal_state.n, goal_state.board)
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    init_state.h = heuristic(init_state.board)
+    queue = OpenList()
+    queue.push(init_state, epsilon * init_state.h, init_state.board, 0)
+    best: Optional[PackedState] = None
+    while not queue.isEmpty():
+        state = queue.pop()
+        if best is not None and state.depth + state.h >= best.depth:
+            continue
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if state == goal_state:
+            best = state
+            if deadline is None:
+                break
+            continue
+        stats.expanded += 1
+        for neighbor in state.neighbors(heuristic):
+            f = neighbor.depth + neighbor.h
+            if best is not None and f >= best.depth:
+                continue
+            priority = neighbor.depth + epsilon * neighbor.h
+            if queue.push(neighbor, priority, neighbor.board, neighbor.depth):
+                stats.generated += 1
+            else:
+                stats.duplicates += 1
+        stats.max_open = max(stats.max_open, len(queue))
+    stats.visited = len(queue.best)
+    plan: List[Direction] = []
+    while best:
+        if best.action:
+            plan.append(best.action)
+        best = best.parent
+    plan.reverse()
+    return plan
+
+
+# Estimated bytes taken by a node of `memory_bounded_a_star`, without its
+# board: the node itself, its entry in its parent and its heap entries
+NODE_BYTES = 400
+
+
+class _BoundedNode:
+    """Node of the search tree kept by `memory_bounded_a_star`.
+
+    `f` is backed up from the children once the node is expanded, and
+    `forgotten` keeps the f-value of every child pruned from memory, so
+    that it is generated again with it when the node is chosen, or not
+    at all if it is infinite.
+    """
+
+    __slots__ = (
+        "board",
+        "blank",
+        "depth",
+        "h",
+        "f",
+        "action",
+        "parent",
+        "children",
+        "forgotten",
+        "version",
+        "is_open",
+    )
+
+    def __init__(
+        self,
+        board: bytes,
+        blank: int,
+        depth: int,
+        h: int,
+        f: float,
+        action: Optional[Direction] = None,
+        parent: Optional["_BoundedNode"] = None,
+    ):
+        self.board = board
+        self.blank = blank
+        self.depth = depth
+        self.h = h
+        self.f = f
+        self.action = action
+        self.parent = parent
+        self.children: Dict[bytes, "_BoundedNode"] = {}
+        self.forgotten: Dict[bytes, float] = {}
+        self.version = 0
+        self.is_open = False
+
+
+def memory_bounded_a_star(
+    init_state: Union[State, PackedState],
+    goal_state: Union[State, PackedState],
+    heuristic: Optional[Union[Heuristic, str]] = None,
+    stats: Optional[SearchStats] = None,
+    max_nodes: int = 0,
+    max_bytes: int = 0,
+) -> List[Direction]:
+    """Memory-bounded A* search (SMA*).
+
+    The search tree never holds more than `max_nodes` nodes, or as many
+    as fit in about `max_bytes` bytes, whichever is lower. When it is
+    full, the leaf with the highest f-value, the shallowest one among
+    ties, is pruned and its f-value is backed up to its parent, which
+    goes back to the open list to regenerate it when it becomes the
+    most promising node again. Expanded nodes take the lowest f-value of
+    their children, so the frontier keeps the best lower bound known
+    for the subtrees it forgot.
+
+    Boards are not deduplicated across the tree, only the move undoing
+    the previous one is skipped, so the search trades time for memory.
+    With an admissible heuristic the plan is optimal if its moves fit
+    in memory, i.e. if it is shorter than the node cap, and the nodes
+    whose f-value reaches the cap are given an infinite one, since no
+    plan through them fits. An empty plan is returned when no plan
+    fits, which is known once the f-value of the root is infinite.
+    `stats.max_open` and `stats.visited` are the peak sizes of the
+    frontier and of the tree.
+    """
+    if stats is None:
+        stats = SearchStats()
+    init_state = pack(init_state)
+    goal_state = pack(goal_state)
+    heuristic = resolve_heuristic(heuristic, goal_state.n, goal_state.board)
+    if max_bytes:
+        per_node = NODE_BYTES + len(goal_state.board)
+        max_nodes = min(max_nodes or sys.maxsize, max_bytes // per_node)
+    if max_nodes < 2:
+        raise ValueError("The search needs room for at least 2 nodes")
+    goal = goal_state.board
+    update = heuristic.update
+    moves = blank_moves(goal_state.n)
+    h = heuristic(init_state.board)
+    root = _BoundedNode(init_state.board, init_state.blank, 0, h, h)
+    # Open nodes ordered by lowest f, deepest first, and by highest f,
+    # shallowest first. Entries are stale once the version of their node
+    # changes.
+    best: List[Tuple[float, int, int, int, _BoundedNode]] = []
+    worst: List[Tuple[float, int, int, int, _BoundedNode]] = []
+    counter = itertools.count()
+    size = 1
+    frontier = 0
+
+    def enqueue(node: _BoundedNode) -> None:
+        nonlocal frontier
+        if not node.is_open:
+            node.is_open = True
+            frontier += 1
+        node.version += 1
+        count = next(counter)
+        heapq.heappush(best, (node.f, -node.depth, count, node.version, node))
+        heapq.heappush(worst, (-node.f, node.depth, count, node.version, node))
+
+    def prune(expanding: _BoundedNode) -> bool:
+        """Forget the worst open leaf, False if there is none"""
+        nonlocal size, frontier
+        kept = []
+        pruned = False
+        while worst:
+            entry = heapq.heappop(worst)
+            node = entry[-1]
+            if not node.is_open or entry[3] != node.version or node.children:
+                continue
+            if node.parent is None or node is expanding:
+                kept.append(entry)
+                continue
+            node.is_open = False
+            frontier -= 1
+            size -= 1
+            parent = node.parent
+            del parent.children[node.board]
+            parent.forgotten[node.board] = node.f
+            enqueue(parent)
+            pruned = True
+            break
+        for entry in kept:
+            heapq.heappush(worst, entry)
+        return pruned
+
+    def back_up(node: Optional[_BoundedNode]) -> None:
+        while node is not None:
+            f = min([child.f for child in node.children.values()], default=math.inf)
+            f = min(f, min(node.forgotten.values(), default=math.inf))
+            if f == node.f:
+                return
+            node.f = f
+            if node.is_open:
+                enqueue(node)
+            node = node.parent
+
+    enqueue(root)
+    while best:
+        f, _, _, version, node = heapq.heappop(best)
+        if not node.is_open or version != node.version:
+            continue
+        if f == math.inf or root.f == math.inf:
+            break
+        if node.board == goal:
+            plan: List[Direction] = []
+            trace: Optional[_BoundedNode] = node
+            while trace is not None and trace.action is not None:
+                plan.append(trace.action)
+                trace = trace.parent
+            plan.reverse()
+            return plan
+        node.is_open = False
+        frontier -= 1
+        stats.expanded += 1
+        last = node.parent.board if node.parent is not None else None
+        for action, pos in moves[node.blank]:
+            board = bytearray(node.board)
+            tile = board[pos]
+            board[node.blank] = tile
+            board[pos] = 0
+            child = bytes(board)
+            if child == last or child in node.children:
+                stats.duplicates += 1
+                continue
+            known = node.forgotten.get(child, 0)
+            if known == math.inf:
+                continue
+            depth = node.depth + 1
+            child_h = update(node.h, child, tile, pos, node.blank)
+            # A plan can't be longer than the nodes that hold it
+            child_f = max(node.f, depth + child_h, known)
+            if child_f >= max_nodes or child != goal and depth >= max_nodes - 1:
+                child_f = math.inf
+            if size >= max_nodes and not prune(node):
+                # Only the path to the node is left in memory, so it is
+                # as deep as the memory allows
+                if node.depth >= max_nodes - 1:
+                    child_f = math.inf
+                node.forgotten[child] = child_f
+                continue
+            node.forgotten.pop(child, None)
+            node.children[child] = _BoundedNode(
+                child, pos, depth, child_h, child_f, action, node
+            )
+            size += 1
+            stats.generated += 1
+            enqueue(node.children[child])
+        if not node.is_open and any(f < math.inf for f in node.forgotten.values()):
+            enqueue(node)
+        back_up(node)
+        stats.max_open = max(stats.max_open, frontier)
+        stats.visited = max(stats.visited, size)
+    return []
+
+
+def bidirectional_search(
+    init_state: Union[State, PackedState],
+    goal_state: Union[State, PackedState],
+    heuristic: Optional[Union[Heuristic, str]] = None,
+    backward_heuristic: Optional[Union[Heuristic, str]] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[Direction]:
+    """Bidirectional A* that meets in the middle (MM).
+
+    A forward search from the initial state and a backward search from
+    the goal run at once, each with its own open list. Nodes are ordered
+    by `max(f, 2 * g)`, so neither search goes past the middle of an
+    optimal plan before the other reaches it, and the side with the
+    smallest priority is expanded next. Every time a node is generated
+    that the other side has already reached, the cost of the plan going
+    through it is recorded, and the search stops once the best one is
+    no larger than the smallest priority left, which makes it optimal.
+
+    `heuristic` estimates the distance to the goal, Manhattan distance
+    by default, and `backward_heuristic` the distance to the initial
+    state, Manhattan distance to it by default. Both can be given by
+    their name in `HEURISTICS`. The backward half of
+    the plan is made of the moves that undo the ones of the backward
+    search, so the plan is the same as with `a_star_puzzle`. Returns an
+    empty plan if the goal can't be reached.
+    """
+    counters = stats if stats is not None else SearchStats()
+    init_state = pack(init_state)
+    goal_state = pack(goal_state)
+    n = init_state.n
+    heuristic = resolve_heuristic(heuristic, n, goal_state.board)
+    backward_heuristic = resolve_heuristic(backward_heuristic, n, init_state.board)
+    moves = blank_moves(n)
+    start, goal = init_state.board, goal_state.board
+    heuristics = (heuristic, backward_heuristic)
+    # For each side, the cost of the best path found to every board, the
+    # board it comes from with the move between both in the forward
+    # direction, and the open list
+    costs: Tuple[Dict[bytes, int], Dict[bytes, int]] = ({start: 0}, {goal: 0})
+    parents: Tuple[Dict[bytes, Tuple[bytes, Direction]], ...] = ({}, {})
+    h_start, h_goal = heuristic(start), backward_heuristic(goal)
+    queues: Tuple[List[Tuple[int, int, bytes, int, int]], ...] = (
+        [(h_start, 0, start, init_state.blank, h_start)],
+        [(h_goal, 0, goal, goal_state.blank, h_goal)],
+    )
+    closed: Tuple[Set[bytes], Set[bytes]] = (set(), set())
+    best = 0 if start == goal else sys.maxsize
+    meeting = start
+    while queues[0] and queues[1]:
+        for side in (0, 1):
+            queue = queues[side]
+            # Drop the entries of boards reached again with a lower cost
+            while queue and (
+                queue[0][2] in closed[side] or costs[side][queue[0][2]] < -queue[0][1]
+            ):
+                heapq.heappop(queue)
+        if not queues[0] or not queues[1]:
+            break
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        if best <= queues[side][0][0]:
+            break
+        _, g, board, blank, h = heapq.heappop(queues[side])
+        g = -g
+        closed[side].add(board)
+        counters.expanded += 1
+        update = heuristics[side].update
+        cost, other = costs[side], costs[1 - side]
+        for dir, pos in moves[blank]:
+            child = bytearray(board)
+            tile = child[pos]
+            child[blank] = tile
+            child[pos] = 0
+            key = bytes(child)
+            if cost.get(key, sys.maxsize) <= g + 1:
+                counters.duplicates += 1
+                continue
+            counters.generated += 1
+            cost[key] = g + 1
+            closed[side].discard(key)
+            if side == 0:
+                parents[0][key] = (board, dir)
+            else:
+                parents[1][key] = (board, OPPOSITE[dir])
+            child_h = update(h, key, tile, pos, blank)
+            priority = max(g + 1 + child_h, 2 * (g + 1))
+            heapq.heappush(queues[side], (priority, -g - 1, key, pos, child_h))
+            if key in other and g + 1 + other[key] < best:
+                best = g + 1 + other[key]
+                meeting = key
+        counters.max_open = max(counters.max_open, len(queues[0]) + len(queues[1]))
+    counters.visited = len(closed[0]) + len(closed[1])
+    if best == sys.maxsize:
+        return []
+
+    plan: List[Direction] = []
+    board = meeting
+    while board != start:
+        board, dir = parents[0][board]
+        plan.append(dir)
+    plan.reverse()
+    board = meeting
+    while board != goal:
+        board, dir = parents[1][board]
+        plan.append(dir)
+    return plan
+
+
+def ida_star_puzzle(
+    init_state: Union[State, PackedState],
+    goal_state: Union[State, PackedState],
+    heuristic: Optional[Union[Heuristic, str]] = None,
+    max_table_size: int = 0,
+    stats: Optional[SearchStats] = None,
+) -> List[Direction]:
+    """IDA* search algorithm.
+
+    Runs successive depth-first searches bounded by the f-value, raising
+    the bound to the smallest f-value that exceeded it, until the goal is
+    found. Only the current path is kept in memory, moves are applied to
+    a single board and undone when backtracking, and the move that would
+    undo the previous one is never tried.
+
+    If `max_table_size` is positive, a transposition table with at most
+    that many entries keeps the lower bounds learned for the states that
+    did not reach the goal, evicting the least recently used entries
+    when it is full. Entries are keyed by board and last move, because
+    the move pruning makes the search below a state depend on the move
+    that reached it.
+
+    Takes the same heuristics and `stats` as `a_star_puzzle` and returns
+    an optimal plan, or an empty plan if the goal can't be reached.
+    """
+    counters = stats if stats is not None else SearchStats()
+    init_state = pack(init_state)
+    goal_state = pack(goal_state)
+    heuristic = resolve_heuristic(heuristic, goal_state.n, goal_state.board)
+    update = heuristic.update
+    goal = goal_state.board
+    board = bytearray(init_state.board)
+    moves = blank_moves(init_state.n)
+    table: "OrderedDict[Tuple[bytes, Optional[Direction]], int]" = OrderedDict()
+    plan: List[Direction] = []
+    found = -1
+    unreachable = sys.maxsize
+
+    def search(
+        blank: int, g: int, h: int, bound: int, last: Optional[Direction]
+    ) -> int:
+        estimate = h
+        key = None
+        if max_table_size > 0:
+            key = (bytes(board), last)
+            if key in table:
+                counters.duplicates += 1
+                table.move_to_end(key)
+                estimate = max(h, table[key])
+        f = g + estimate
+        if f > bound:
+            return f
+        if board == goal:
+            return found
+        counters.expanded += 1
+        counters.max_open = max(counters.max_open, g + 1)
+        minimum = unreachable
+        for dir, pos in moves[blank]:
+            if last is not None and dir == OPPOSITE[last]:
+                continue
+            tile = board[pos]
+            board[blank] = tile
+            board[pos] = 0
+            counters.generated += 1
+            plan.append(dir)
+            t = search(
+                pos, g + 1, update(h, bytes(board), tile, pos, blank), bound, dir
+            )
+            if t == found:
+                return found
+            plan.pop()
+            board[pos] = tile
+            board[blank] = 0
+            minimum = min(minimum, t)
+        if key is not None:
+            # No plan shorter than minimum - g starts at this state
+            table[key] = minimum - g
+            if len(table) > max_table_size:
+                table.popitem(last=False)
+        return minimum
+
+    h = bound = heuristic(init_state.board)
+    while True:
+        t = search(init_state.blank, 0, h, bound, None)
+        counters.visited = len(table)
+        if t == found:
+            return plan
+        if t == unreachable:
+            return []
+        bound = t
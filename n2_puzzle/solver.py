@@ -1,31 +1,290 @@
-from n2_puzzle.greedy import process_column, process_row
-from n2_puzzle.puzzle import NPuzzle, animate_plan, generate_template_board
-from n2_puzzle.search import State, a_star_puzzle
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
 
+from n2_puzzle.cache import PlanCache
+from n2_puzzle.endgame import EndgameTable
+from n2_puzzle.greedy import column_steps, process_column, process_row, row_steps
+from n2_puzzle.heuristics import make_heuristic, resolve_batch_heuristic
+from n2_puzzle.peephole import optimize_plan
+from n2_puzzle.puzzle import Direction, NPuzzle, apply_plan, generate_template_board
+from n2_puzzle.search import PackedState, SearchStats, anytime_a_star, batched_a_star
 
-def solve_puzzle(puzzle: NPuzzle):
+# Sizes of the sub-board left for the endgame search
+ENDGAME_SIZES = (3, 4, 5)
+
+
+@dataclass
+class PhaseStats:
+    """Moves emitted and wall time spent by one phase of a solve"""
+
+    name: str
+    moves: int
+    time: float
+
+
+@dataclass
+class SolveStats:
+    """What a call to `solve_puzzle` did.
+
+    `phases` lists every `process_row` and `process_column` call, the
+    endgame and the peephole pass, in the order they ran. The moves of
+    the peephole pass are negative, since it removes moves from the
+    plan. `search` holds the counters of the endgame search.
+    """
+
+    phases: List[PhaseStats] = field(default_factory=list)
+    search: SearchStats = field(default_factory=SearchStats)
+    plan_length: int = 0
+    time: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def greedy_phases(
+    puzzle: NPuzzle, moves: List[Direction], endgame: int = 3
+) -> Iterator[str]:
+    """Reduce the puzzle row by row and column by column.
+
+    The reduction stops when an `endgame` x `endgame` sub-board is
+    left. The name of each
+    greedy phase (`process_row` or `process_column`) is yielded once
+    its moves are applied to `puzzle` and appended to `moves`, so
+    callers can measure the phases one by one.
+    """
+    for i in range(puzzle.n - endgame):
+        process_row(puzzle, i, moves)
+        yield "process_row"
+        process_column(puzzle, i, moves)
+        yield "process_column"
+
+
+def endgame_board(puzzle: NPuzzle, size: int = 3) -> bytes:
+    """Packed bottom-right `size` x `size` sub-board of the puzzle.
+
+    Tiles are relabeled after their position in the reduced goal, so
+    the sub-board can be solved against the goal of its size whatever
+    the size of the original board is.
+    """
     n = puzzle.n
-    for i in range(n):
-        if n == 3:
-            break
-        it = i
-        jt = i
-        start_value = jt * puzzle.n + jt + 1
-        process_row(puzzle, it, start_value)
-        process_column(puzzle, jt, start_value)
-        n -= 1
-
-    # Extract sub-puzzle to solve
-    puzzle_init_state = []
-    for row in puzzle.board[-3:]:
-        puzzle_init_state.append(row[-3:])
-    init_state = State(NPuzzle(puzzle_init_state))
-    puzzle_goal = generate_template_board(puzzle.n, is_goal=True)
-    puzzle_goal_reduced = []
-
-    # Create the goal state
-    for row in puzzle_goal[-3:]:
-        puzzle_goal_reduced.append(row[-3:])
-    goal_state = State(NPuzzle(puzzle_goal_reduced))
-    plan = a_star_puzzle(init_state, goal_state)
-    animate_plan(puzzle, plan)
+    cells = [i * n + j for i in range(n - size, n) for j in range(n - size, n)]
+    labels = {0: 0}
+    for pos in cells[:-1]:
+        labels[pos + 1] = len(labels)
+    return bytes(labels[puzzle.cells[pos]] for pos in cells)
+
+
+def solve_endgame(
+    puzzle: NPuzzle,
+    moves: List[Direction],
+    stats: Optional[SearchStats] = None,
+    size: int = 3,
+    epsilon: float = 1.0,
+    time_budget: Optional[float] = None,
+    heuristic: str = "manhattan",
+    cache: Optional[PlanCache] = None,
+    batch_size: int = 0,
+) -> None:
+    """Solve the reduced `size` x `size` puzzle.
+
+    A 3x3 sub-board is solved optimally by walking the `EndgameTable`.
+    Larger ones are searched with `anytime_a_star`, with the given
+    `epsilon`, `time_budget` and the `heuristic` registered under that
+    name in `HEURISTICS`. With `batch_size`, they are solved optimally
+    by `batched_a_star` instead, with the heuristic of that name in
+    `BATCH_HEURISTICS`, and `epsilon` and `time_budget` are ignored.
+    If the search finds no plan within `time_budget`, the sub-board is
+    reduced by `greedy_phases` down to 3x3 instead, so the endgame
+    takes little more than its budget. With `cache`, the plans of
+    these searches are looked up in the `PlanCache` first, and stored
+    in it afterwards.
+    """
+    board = endgame_board(puzzle, size)
+    if size == 3:
+        plan = EndgameTable.load().solve(board, stats)
+        apply_plan(puzzle, plan, moves)
+        return
+    goal = bytes(tile for row in generate_template_board(size, True) for tile in row)
+    tag = f"endgame:{epsilon}:{time_budget}:{heuristic}:{batch_size}"
+    cached = cache.get(tag, board, goal) if cache is not None else None
+    if cached is not None:
+        plan = cached
+    else:
+        init_state = PackedState(board, size, board.index(0))
+        goal_state = PackedState(goal, size, goal.index(0))
+        if batch_size:
+            plan = batched_a_star(
+                init_state, goal_state, heuristic, stats, batch_size=batch_size
+            )
+        else:
+            plan = anytime_a_star(
+                init_state,
+                goal_state,
+                heuristic=heuristic,
+                stats=stats,
+                epsilon=epsilon,
+                time_budget=time_budget,
+            )
+            if not plan and board != goal:
+                sub_board = NPuzzle(
+                    [list(board[i * size : (i + 1) * size]) for i in range(size)]
+                )
+                for _ in greedy_phases(sub_board, plan):
+                    pass
+                solve_endgame(sub_board, plan, stats)
+        if cache is not None:
+            cache.put(tag, board, goal, plan)
+    apply_plan(puzzle, plan, moves)
+
+
+def check_endgame_options(endgame: int, heuristic: str, batch_size: int = 0) -> None:
+    """Raise a ValueError if `heuristic` can't guide the endgame search.
+
+    Heuristics of a limited board size, such as the walking distance,
+    are rejected for larger endgames, and heuristics that can't be
+    batched are rejected with `batch_size`. The 3x3 endgame is read
+    from a table and takes any heuristic.
+    """
+    if endgame == 3:
+        return
+    goal = bytes(tile for row in generate_template_board(endgame, True) for tile in row)
+    if batch_size:
+        resolve_batch_heuristic(heuristic, endgame, goal)
+    else:
+        make_heuristic(heuristic, endgame, goal)
+
+
+def _endgame_size(puzzle: NPuzzle, endgame: int) -> int:
+    if endgame not in ENDGAME_SIZES:
+        raise ValueError(f"The endgame size must be one of {ENDGAME_SIZES}")
+    return min(endgame, puzzle.n)
+
+
+def solve_puzzle(
+    puzzle: NPuzzle,
+    optimize: bool = True,
+    stats: Optional[SolveStats] = None,
+    endgame: int = 3,
+    epsilon: float = 1.0,
+    time_budget: Optional[float] = None,
+    heuristic: str = "manhattan",
+    cache: Optional[PlanCache] = None,
+    batch_size: int = 0,
+) -> List[Direction]:
+    """Solve the puzzle and return the plan that solves it.
+
+    The greedy phases reduce the board row by row and column by
+    column until an `endgame` x `endgame` sub-board is left, 3x3 by
+    default, which is solved by `solve_endgame`. A 3x3 sub-board is
+    solved optimally by walking the precomputed `EndgameTable`, and
+    4x4 or 5x5 ones with a weighted A* search whose plan is at most
+    `epsilon` times longer than an optimal one, guided by the
+    `heuristic` of that name. With `time_budget`, that search keeps
+    shortening its plan for that many seconds, and if it has none by
+    then the endgame is reduced greedily to 3x3. With `batch_size`, the
+    endgame is solved optimally by `batched_a_star` instead.
+    Larger endgames take longer to solve but spare the greedy moves
+    of the rows and columns they cover. If `optimize` is True, the
+    plan is then shortened with `optimize_plan`. If `stats` is given,
+    it is filled with what every phase did.
+
+    With `cache`, the whole plan is looked up in the `PlanCache` first,
+    in which case it is applied to `puzzle` as a single `cache` phase,
+    and the plans of the whole board and of a 4x4 or 5x5 endgame are
+    stored in it afterwards.
+
+    The moves are applied to `puzzle` as they are decided, without
+    drawing anything, so to animate the solution replay the returned
+    plan on a copy of the original board with `animate_plan`.
+    """
+    endgame = _endgame_size(puzzle, endgame)
+    counters = stats if stats is not None else SolveStats()
+    start = last = time.perf_counter()
+    blank = puzzle.positions[0]
+    moves: List[Direction] = []
+    emitted = 0
+
+    def record(name: str) -> None:
+        nonlocal last, emitted
+        now = time.perf_counter()
+        counters.phases.append(PhaseStats(name, len(moves) - emitted, now - last))
+        last = now
+        emitted = len(moves)
+
+    tag = (
+        f"solve:{endgame}:{epsilon}:{time_budget}:{heuristic}:{optimize}"
+        f":{batch_size}"
+    )
+    board = puzzle.cells.tolist()
+    goal = [tile for row in generate_template_board(puzzle.n, True) for tile in row]
+    cached = cache.get(tag, board, goal) if cache is not None else None
+    if cached is not None:
+        apply_plan(puzzle, cached, moves)
+        record("cache")
+    else:
+        for phase in greedy_phases(puzzle, moves, endgame):
+            record(phase)
+        solve_endgame(
+            puzzle,
+            moves,
+            counters.search,
+            endgame,
+            epsilon,
+            time_budget,
+            heuristic,
+            cache,
+            batch_size,
+        )
+        record("endgame")
+        if optimize:
+            moves = optimize_plan(moves, puzzle.n, blank)
+            record("peephole")
+        if cache is not None:
+            cache.put(tag, board, goal, moves)
+    counters.plan_length = len(moves)
+    counters.time = time.perf_counter() - start
+    return moves
+
+
+def solve_stream(
+    puzzle: NPuzzle,
+    endgame: int = 3,
+    epsilon: float = 1.0,
+    time_budget: Optional[float] = None,
+    heuristic: str = "manhattan",
+    cache: Optional[PlanCache] = None,
+    batch_size: int = 0,
+) -> Iterator[Direction]:
+    """Solve the puzzle yielding every move as soon as it is decided.
+
+    The moves are the ones of `solve_puzzle` without the peephole pass,
+    which needs the whole plan. Each greedy step moves a tile by one
+    cell, so the moves are yielded in batches of O(n) moves, and the
+    time spent between two batches is the time to route the blank
+    around the tile, O(n) cells. It is bounded by the time of the
+    endgame, which is solved in one go: a 3x3 one takes microseconds,
+    while 4x4 and 5x5 ones take as long as their search.
+
+    The moves are applied to `puzzle` before being yielded. `cache` and
+    `batch_size` are only used for the endgame, as in `solve_endgame`.
+    """
+    endgame = _endgame_size(puzzle, endgame)
+    moves: List[Direction] = []
+    for i in range(puzzle.n - endgame):
+        for steps in (row_steps(puzzle, i, moves), column_steps(puzzle, i, moves)):
+            for _ in steps:
+                yield from moves
+                moves.clear()
+    solve_endgame(
+        puzzle,
+        moves,
+        None,
+        endgame,
+        epsilon,
+        time_budget,
+        heuristic,
+        cache,
+        batch_size,
+    )
+    yield from moves
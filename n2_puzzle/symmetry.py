@@ -0,0 +1,72 @@
+from functools import lru_cache
+from typing import List, Sequence, Tuple, TypeVar
+
+from n2_puzzle.puzzle import TRANSPOSED, Direction
+
+Board = TypeVar("Board", bytes, List[int])
+
+
+@lru_cache(maxsize=None)
+def transposed_positions(n: int) -> Tuple[int, ...]:
+    """Flat position that every flat position takes when transposed"""
+    return tuple((pos % n) * n + pos // n for pos in range(n * n))
+
+
+@lru_cache(maxsize=None)
+def transposed_tiles(n: int) -> Tuple[int, ...]:
+    """Label that every tile takes when the board is transposed.
+
+    Each tile takes the label of the goal tile found at the transposed
+    position of its goal position, so the goal of
+    `generate_template_board` is its own transpose. The blank keeps
+    its label.
+    """
+    positions = transposed_positions(n)
+    return (0,) + tuple(positions[tile - 1] + 1 for tile in range(1, n * n))
+
+
+@lru_cache(maxsize=None)
+def _translation(n: int) -> bytes:
+    return bytes(transposed_tiles(n)) + bytes(256 - n * n)
+
+
+def transpose_board(board: Board, n: int) -> Board:
+    """Reflect a board, given as its tiles row by row, about its diagonal.
+
+    The tiles are relabeled with `transposed_tiles`, so a plan solves a
+    board if and only if its `transpose_plan` solves the transposed
+    board. Packed boards stay packed.
+    """
+    positions = transposed_positions(n)
+    if isinstance(board, (bytes, bytearray)):
+        return bytes(board[pos] for pos in positions).translate(_translation(n))
+    tiles = transposed_tiles(n)
+    return [tiles[board[pos]] for pos in positions]
+
+
+def transpose_plan(plan: Sequence[Direction]) -> List[Direction]:
+    return [TRANSPOSED[action] for action in plan]
+
+
+def canonical_board(board: Board, n: int) -> Tuple[Board, bool]:
+    """Canonical representative of a board and its transpose.
+
+    Returns the lowest of both in lexicographic order, and whether it
+    is the transpose. Plans for the canonical board are mapped back
+    with `transpose_plan` when it is.
+    """
+    transposed = transpose_board(board, n)
+    if transposed < board:
+        return transposed, True
+    return board, False
+
+
+def is_standard_goal(goal: Sequence[int]) -> bool:
+    """Check if `goal` is the goal of `generate_template_board`"""
+    return goal[-1] == 0 and all(tile == pos + 1 for pos, tile in enumerate(goal[:-1]))
+
+
+def transposed_pattern(n: int, tiles: Sequence[int]) -> Tuple[int, ...]:
+    """Tiles of the goal found at the transposed positions of `tiles`"""
+    labels = transposed_tiles(n)
+    return tuple(labels[tile] for tile in tiles)
@@ -1,4 +1,8 @@
 import heapq
+import os
+import signal
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
 
 
 class PriorityQueue:
@@ -17,3 +21,170 @@ class PriorityQueue:
 
     def isEmpty(self):
         return len(self.heap) == 0
+
+
+class OpenList:
+    """Open list of a best-first search with lazy deletion.
+
+    Every item is pushed with the `key` of its state and the `cost` of
+    the path that reached it. The best cost of every key is kept, so
+    pushing a key with a cost that is not better is ignored, and the
+    entries that a cheaper push made stale are skipped when they reach
+    the top of the heap instead of being searched for and removed. Ties
+    between priorities are broken towards the higher cost, that is, the
+    deeper node.
+    """
+
+    def __init__(self) -> None:
+        self.heap: List[Tuple[Any, int, int, Hashable, Any]] = []
+        self.best: Dict[Hashable, int] = {}
+        self.count = 0
+        self.stale = 0
+
+    def push(self, item: Any, priority: Any, key: Hashable, cost: int) -> bool:
+        """Push an item, returning False if its key has a better cost"""
+        best = self.best.get(key)
+        if best is not None and best <= cost:
+            return False
+        self.best[key] = cost
+        heapq.heappush(self.heap, (priority, -cost, self.count, key, item))
+        self.count += 1
+        return True
+
+    def _drop_stale(self) -> None:
+        heap = self.heap
+        while heap and self.best[heap[0][3]] != -heap[0][1]:
+            heapq.heappop(heap)
+            self.stale += 1
+
+    def pop(self) -> Any:
+        """Pop the item with the lowest priority"""
+        self._drop_stale()
+        return heapq.heappop(self.heap)[4]
+
+    def peek(self) -> Any:
+        """Priority of the item that `pop` would return"""
+        self._drop_stale()
+        return self.heap[0][0]
+
+    def isEmpty(self) -> bool:
+        self._drop_stale()
+        return not self.heap
+
+    def __len__(self) -> int:
+        """Number of entries in the heap, stale ones included"""
+        return len(self.heap)
+
+
+class BucketOpenList:
+    """Open list with a bucket for every integer priority and cost.
+
+    Drop-in alternative to `OpenList` when priorities are small
+    non-negative integers, as the f-values of the sliding puzzle are.
+    Entries are appended to the bucket of their priority and cost, so
+    pushing is O(1), and popping takes them from the highest cost bucket
+    of the lowest priority, so ties are broken towards the deeper node.
+    The lowest priority only moves forward while popping, which keeps
+    popping O(1) amortized for consistent heuristics.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: List[List[List[Tuple[Hashable, int, Any]]]] = []
+        self.best: Dict[Hashable, int] = {}
+        self.low = 0
+        self.size = 0
+        self.count = 0
+        self.stale = 0
+
+    def push(self, item: Any, priority: int, key: Hashable, cost: int) -> bool:
+        """Push an item, returning False if its key has a better cost"""
+        best = self.best.get(key)
+        if best is not None and best <= cost:
+            return False
+        self.best[key] = cost
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append([])
+        costs = buckets[priority]
+        while len(costs) <= cost:
+            costs.append([])
+        costs[cost].append((key, cost, item))
+        if priority < self.low:
+            self.low = priority
+        self.size += 1
+        self.count += 1
+        return True
+
+    def _top(self) -> Optional[List[Tuple[Hashable, int, Any]]]:
+        """Bucket of the next item to pop, dropping the stale entries"""
+        buckets = self.buckets
+        while self.low < len(buckets):
+            costs = buckets[self.low]
+            while costs:
+                bucket = costs[-1]
+                while bucket:
+                    key, cost, _ = bucket[-1]
+                    if self.best[key] == cost:
+                        return bucket
+                    bucket.pop()
+                    self.size -= 1
+                    self.stale += 1
+                costs.pop()
+            self.low += 1
+        return None
+
+    def pop(self) -> Any:
+        """Pop the item with the lowest priority"""
+        bucket = self._top()
+        if bucket is None:
+            raise IndexError("pop from an empty open list")
+        self.size -= 1
+        return bucket.pop()[2]
+
+    def isEmpty(self) -> bool:
+        return self._top() is None
+
+    def __len__(self) -> int:
+        """Number of entries in the buckets, stale ones included"""
+        return self.size
+
+
+def data_dir() -> str:
+    """Directory where precomputed tables are stored.
+
+    It can be set with the `N2_PUZZLE_DATA` environment variable and
+    defaults to `~/.cache/n2_puzzle`. The directory is created if it
+    does not exist.
+    """
+    path = os.environ.get(
+        "N2_PUZZLE_DATA", os.path.join(os.path.expanduser("~"), ".cache", "n2_puzzle")
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class TimeLimitExceeded(Exception):
+    pass
+
+
+def _raise_time_limit(signum, frame):
+    raise TimeLimitExceeded()
+
+
+@contextmanager
+def time_limit(seconds: Optional[float]) -> Iterator[None]:
+    """Raise `TimeLimitExceeded` if the block runs for more than `seconds`.
+
+    The limit relies on `SIGALRM`, so it is only enforced in the main
+    thread and on platforms that have it. `None` disables the limit.
+    """
+    if seconds is None or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_time_limit)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -0,0 +1,118 @@
+import argparse
+import json
+import sys
+
+from n2_puzzle.batch import read_boards, solve_batch
+from n2_puzzle.cache import plan_cache_path
+from n2_puzzle.heuristics import HEURISTICS
+from n2_puzzle.solver import ENDGAME_SIZES, check_endgame_options
+
+parser = argparse.ArgumentParser(
+    prog="NPuzzleBatchSolver",
+    description="Solves many N^2 - 1 puzzles, one board per line",
+    epilog="Each result is written as a JSON line",
+)
+
+parser.add_argument(
+    "input",
+    nargs="?",
+    type=argparse.FileType("r"),
+    default=sys.stdin,
+    help="File with one board per line, tiles row by row (default: stdin)",
+)
+parser.add_argument(
+    "--processes", type=int, default=None, help="Worker processes (default: CPUs)"
+)
+parser.add_argument(
+    "--chunksize", type=int, default=1, help="Boards sent to a worker at once"
+)
+parser.add_argument(
+    "--timeout", type=float, default=None, help="Seconds allowed per board"
+)
+parser.add_argument(
+    "--unordered",
+    action="store_true",
+    help="Write the results as they complete instead of in input order",
+)
+parser.add_argument(
+    "--stats",
+    action="store_true",
+    help="Add the moves, time and search counters of every phase to the results",
+)
+
+parser.add_argument(
+    "--endgame",
+    type=int,
+    choices=ENDGAME_SIZES,
+    default=3,
+    help="Size of the sub-board solved by search instead of greedily",
+)
+parser.add_argument(
+    "--epsilon",
+    type=float,
+    default=1.0,
+    help="Endgame plans of 4x4 and 5x5 are at most this many times too long",
+)
+parser.add_argument(
+    "--budget",
+    type=float,
+    default=None,
+    help="Seconds spent shortening the plan of a 4x4 or 5x5 endgame",
+)
+parser.add_argument(
+    "--heuristic",
+    choices=list(HEURISTICS),
+    default="manhattan",
+    help="Heuristic of the 4x4 and 5x5 endgame search",
+)
+parser.add_argument(
+    "--batch-size",
+    type=int,
+    default=0,
+    help="Solve 4x4 and 5x5 endgames optimally, scoring this many boards at once"
+    " with NumPy (manhattan and linear-conflict only)",
+)
+parser.add_argument(
+    "--cache",
+    nargs="?",
+    const="",
+    default=None,
+    metavar="PATH",
+    help="Reuse the plans of boards already solved, stored in this SQLite file"
+    " (default: plans.sqlite in the data directory)",
+)
+
+
+def main():
+    args = parser.parse_args()
+    try:
+        check_endgame_options(args.endgame, args.heuristic, args.batch_size)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+    options = {
+        "endgame": args.endgame,
+        "epsilon": args.epsilon,
+        "time_budget": args.budget,
+        "heuristic": args.heuristic,
+        "batch_size": args.batch_size,
+    }
+    if args.cache is not None:
+        options["cache_path"] = args.cache or plan_cache_path()
+    results = solve_batch(
+        read_boards(args.input),
+        processes=args.processes,
+        chunksize=args.chunksize,
+        timeout=args.timeout,
+        ordered=not args.unordered,
+        stats=args.stats,
+        options=options,
+    )
+    try:
+        for result in results:
+            print(json.dumps(result.to_dict()), flush=True)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
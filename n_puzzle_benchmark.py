@@ -0,0 +1,86 @@
+import argparse
+import json
+import sys
+
+from n2_puzzle.benchmark import compare, parallel_report, run_benchmark, scaling_report
+
+parser = argparse.ArgumentParser(
+    prog="NPuzzleBenchmark",
+    description="Benchmarks the greedy phases, the endgame search and full solves",
+    epilog="Write a baseline with --output and check a change with --compare",
+)
+
+parser.add_argument("--max-n", type=int, default=8, help="Largest puzzle dimension")
+parser.add_argument("--seeds", type=int, default=5, help="Scrambles per dimension")
+parser.add_argument(
+    "--repeat", type=int, default=3, help="Runs per board, the fastest is kept"
+)
+parser.add_argument(
+    "--timeout", type=float, default=10, help="Seconds allowed per board"
+)
+parser.add_argument("--output", help="Write the results as JSON to this file")
+parser.add_argument("--compare", help="Baseline JSON file to compare against")
+parser.add_argument(
+    "--scaling",
+    type=int,
+    nargs="*",
+    metavar="N",
+    help="Only report the solve time per move for boards of these sizes",
+)
+parser.add_argument(
+    "--parallel",
+    type=int,
+    nargs="*",
+    metavar="WORKERS",
+    help="Only report the speedup of the parallel search with these workers",
+)
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=0.25,
+    help="Relative slowdown allowed before flagging a regression",
+)
+
+
+def main():
+    args = parser.parse_args()
+    if args.scaling is not None:
+        print(f"{'n':>5} {'plan length':>12} {'time (s)':>10} {'us/move':>8}")
+        for row in scaling_report(args.scaling or (10, 20, 40, 60, 80, 100)):
+            print(
+                f"{row['n']:>5} {row['plan_length']:>12} {row['time']:>10.2f} "
+                f"{row['time_per_move'] * 1e6:>8.2f}"
+            )
+        return
+    if args.parallel is not None:
+        print(f"{'workers':>7} {'plan length':>12} {'time (s)':>9} {'speedup':>8}")
+        for row in parallel_report(args.parallel or (1, 2, 4, 8)):
+            # Workers 0 is the single process A* the speedups refer to
+            workers = row["workers"] or "A*"
+            print(
+                f"{workers:>7} {row['plan_length']:>12} {row['time']:>9.2f} "
+                f"{row['speedup']:>8.2f}"
+            )
+        return
+
+    results = run_benchmark(args.max_n, args.seeds, args.repeat, args.timeout)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
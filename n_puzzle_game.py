@@ -1,14 +1,22 @@
 import argparse
+import json
 from typing import Union
 
+from n2_puzzle.heuristics import HEURISTICS
 from n2_puzzle.puzzle import (
     Direction,
     NPuzzle,
+    TerminalRenderer,
     animate_plan,
     draw_puzzle,
     generate_template_board,
 )
-from n2_puzzle.solver import solve_puzzle
+from n2_puzzle.solver import (
+    ENDGAME_SIZES,
+    SolveStats,
+    check_endgame_options,
+    solve_puzzle,
+)
 
 GOD_MODE = "god"
 
@@ -19,6 +27,53 @@ parser = argparse.ArgumentParser(
 )
 
 parser.add_argument("--n", type=int, default=3, help="Puzzle dimension")
+parser.add_argument(
+    "--stats",
+    action="store_true",
+    help="Print the solver statistics as JSON after solving in god mode",
+)
+
+parser.add_argument(
+    "--delay", type=float, default=0.1, help="Seconds between animation frames"
+)
+parser.add_argument(
+    "--duration",
+    type=float,
+    default=None,
+    help="Skip frames so that the god mode animation takes about this many seconds",
+)
+parser.add_argument(
+    "--endgame",
+    type=int,
+    choices=ENDGAME_SIZES,
+    default=3,
+    help="Size of the sub-board solved by search instead of greedily",
+)
+parser.add_argument(
+    "--epsilon",
+    type=float,
+    default=1.0,
+    help="Endgame plans of 4x4 and 5x5 are at most this many times too long",
+)
+parser.add_argument(
+    "--budget",
+    type=float,
+    default=None,
+    help="Seconds spent shortening the plan of a 4x4 or 5x5 endgame",
+)
+parser.add_argument(
+    "--heuristic",
+    choices=list(HEURISTICS),
+    default="manhattan",
+    help="Heuristic of the 4x4 and 5x5 endgame search",
+)
+parser.add_argument(
+    "--batch-size",
+    type=int,
+    default=0,
+    help="Solve 4x4 and 5x5 endgames optimally, scoring this many boards at once"
+    " with NumPy (manhattan and linear-conflict only)",
+)
 
 
 def is_valid_move(puzzle: NPuzzle, tile: Union[str, int]) -> bool:
@@ -32,7 +87,7 @@ def is_valid_move(puzzle: NPuzzle, tile: Union[str, int]) -> bool:
     return bi == ti - 1 or bi == ti + 1 or bj == tj - 1 or bj == tj + 1
 
 
-def player_move(puzzle: NPuzzle, tile: int) -> None:
+def player_move(puzzle: NPuzzle, tile: int, renderer: TerminalRenderer) -> None:
     ti, tj = puzzle.tile_pos[tile]
     bi, bj = puzzle.tile_pos[0]
     if bi == ti - 1:
@@ -45,7 +100,7 @@ def player_move(puzzle: NPuzzle, tile: int) -> None:
     else:
         dir = Direction.LEFT
 
-    animate_plan(puzzle, [dir])
+    animate_plan(puzzle, [dir], renderer)
 
 
 def player_input(puzzle: NPuzzle) -> Union[str, int]:
@@ -70,11 +125,15 @@ def puzzle_is_complete(puzzle: NPuzzle) -> bool:
 
 def main():
     args = parser.parse_args()
+    try:
+        check_endgame_options(args.endgame, args.heuristic, args.batch_size)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
     n = args.n
 
-    # TODO: Add support for n == 9
-    assert 3 <= n <= 8, f"Unsupported n: {n}"
+    assert n >= 3, f"Unsupported n: {n}"
 
+    renderer = TerminalRenderer(delay=args.delay, duration=args.duration)
     puzzle = NPuzzle(generate_template_board(n))
     draw_puzzle(puzzle)
     while not puzzle_is_complete(puzzle):
@@ -82,10 +141,23 @@ def main():
         if tile_to_move == GOD_MODE:
             print("Activating GOD MODE!")
             input("Press any key to continue...")
-            solve_puzzle(puzzle)
+            board = [list(row) for row in puzzle.board]
+            stats = SolveStats()
+            plan = solve_puzzle(
+                NPuzzle(board),
+                stats=stats,
+                endgame=args.endgame,
+                epsilon=args.epsilon,
+                time_budget=args.budget,
+                heuristic=args.heuristic,
+                batch_size=args.batch_size,
+            )
+            animate_plan(puzzle, plan, renderer)
+            if args.stats:
+                print(json.dumps(stats.to_dict(), indent=2))
             continue
 
-        player_move(puzzle, tile_to_move)
+        player_move(puzzle, tile_to_move, renderer)
 
     print("Puzzle was solved!")
 
@@ -0,0 +1,54 @@
+import argparse
+import sys
+
+from n2_puzzle.scramble import random_boards, random_boards_array, random_walk_boards
+
+parser = argparse.ArgumentParser(
+    prog="NPuzzleScramble",
+    description="Generates random solvable N^2 - 1 puzzles, one board per line",
+    epilog="Boards are written in the input format of the batch solver",
+)
+
+parser.add_argument("n", type=int, help="Dimension of the boards")
+parser.add_argument("--count", type=int, default=1, help="Boards to generate")
+parser.add_argument(
+    "--seed", type=int, default=None, help="Seed to reproduce the same boards"
+)
+parser.add_argument(
+    "--walk",
+    type=int,
+    default=None,
+    metavar="DEPTH",
+    help="Walk the blank DEPTH moves from the goal instead of shuffling",
+)
+parser.add_argument(
+    "--numpy",
+    action="store_true",
+    help="Generate the boards in vectorized batches (requires numpy)",
+)
+
+
+def main():
+    args = parser.parse_args()
+    if args.n < 3:
+        parser.error("n must be at least 3")
+    if args.numpy and args.walk is not None:
+        parser.error("--numpy can't be used with --walk")
+    write = sys.stdout.write
+    if args.numpy:
+        try:
+            for boards in random_boards_array(args.n, args.count, args.seed):
+                write("".join(" ".join(map(str, board)) + "\n" for board in boards))
+        except ImportError as e:
+            parser.error(str(e))
+        return
+    if args.walk is not None:
+        boards = random_walk_boards(args.n, args.walk, args.count, args.seed)
+    else:
+        boards = random_boards(args.n, args.count, args.seed)
+    for board in boards:
+        write(" ".join(str(tile) for row in board for tile in row) + "\n")
+
+
+if __name__ == "__main__":
+    main()
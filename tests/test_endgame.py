@@ -0,0 +1,42 @@
+from collections import deque
+
+from n2_puzzle.endgame import BLOCKS, HALF, rank
+from n2_puzzle.puzzle import generate_template_board
+from n2_puzzle.search import blank_moves
+from n2_puzzle.symmetry import transpose_board
+
+
+def reachable_boards(n):
+    goal = bytes(tile for row in generate_template_board(n, True) for tile in row)
+    moves = blank_moves(n)
+    seen = {goal}
+    queue = deque([goal])
+    while queue:
+        board = queue.popleft()
+        blank = board.index(0)
+        for _, pos in moves[blank]:
+            child = bytearray(board)
+            child[blank], child[pos] = child[pos], 0
+            child = bytes(child)
+            if child not in seen:
+                seen.add(child)
+                queue.append(child)
+    return seen
+
+
+def test_rank_is_dense_and_unique():
+    boards = reachable_boards(3)
+    assert len(boards) == 181_440
+    ranked = {}
+    for board in boards:
+        # Boards with the blank above the diagonal share the entry of
+        # their transpose
+        key = board if board.index(0) in BLOCKS else transpose_board(board, 3)
+        ranked.setdefault(rank(board), set()).add(key)
+    assert sorted(ranked) == list(range(len(BLOCKS) * HALF))
+    assert all(len(keys) == 1 for keys in ranked.values())
+
+
+def test_rank_takes_bytearray():
+    board = bytes([8, 6, 7, 2, 5, 4, 3, 0, 1])
+    assert rank(bytearray(board)) == rank(board)
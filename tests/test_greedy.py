@@ -0,0 +1,69 @@
+import pytest
+
+from n2_puzzle import greedy
+from n2_puzzle.puzzle import NPuzzle, generate_template_board
+from n2_puzzle.scramble import is_solvable, random_boards
+from n2_puzzle.solver import solve_puzzle, solve_stream
+
+SIZES = [3, 4, 5, 8, 13, 20, 31]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def data_dir(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("N2_PUZZLE_DATA", str(tmp_path_factory.mktemp("data")))
+        yield
+
+
+def replay(board, plan):
+    puzzle = NPuzzle(board)
+    assert all(puzzle.move(action) for action in plan)
+    return puzzle.board
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_solve_puzzle_random_boards(n):
+    for board in random_boards(n, 3, seed=n):
+        plan = solve_puzzle(NPuzzle(board))
+        assert replay(board, plan) == generate_template_board(n, True)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_solve_stream_random_boards(n):
+    for board in random_boards(n, 3, seed=n):
+        puzzle = NPuzzle(board)
+        plan = list(solve_stream(puzzle))
+        assert puzzle.board == generate_template_board(n, True)
+        assert replay(board, plan) == generate_template_board(n, True)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_solve_template_board(n):
+    board = generate_template_board(n)
+    plan = solve_puzzle(NPuzzle(board))
+    assert replay(board, plan) == generate_template_board(n, True)
+
+
+@pytest.mark.parametrize(
+    "board",
+    [
+        # The last tile of the first row is left of the second to last
+        [[1, 2, 4, 3], [5, 6, 0, 7], [8, 9, 10, 11], [12, 13, 14, 15]],
+        # The same in the first column
+        [[1, 2, 3, 4], [5, 6, 7, 8], [13, 10, 11, 12], [9, 14, 15, 0]],
+    ],
+)
+def test_trapped_last_tile(monkeypatch, board):
+    if not is_solvable(board):
+        board[-1][1], board[-1][2] = board[-1][2], board[-1][1]
+    plans = []
+
+    def apply(puzzle, plan, transposed, moves):
+        plans.append(plan)
+        apply_plan(puzzle, plan, transposed, moves)
+
+    apply_plan = greedy._apply
+    monkeypatch.setattr(greedy, "_apply", apply)
+    plan = solve_puzzle(NPuzzle(board))
+    assert greedy.TRAPPED_LAST_TILE in plans
+    assert replay(board, plan) == generate_template_board(4, True)
@@ -0,0 +1,22 @@
+import pytest
+
+from n2_puzzle.heuristics import ManhattanHeuristic
+from n2_puzzle.parallel import hda_star
+from n2_puzzle.puzzle import NPuzzle, generate_template_board
+from n2_puzzle.search import PackedState, State
+
+
+class BrokenHeuristic(ManhattanHeuristic):
+    def update(self, h, board, tile, src, dst):
+        raise ZeroDivisionError
+
+
+def test_dead_worker_stops_the_search():
+    goal = PackedState.from_puzzle(NPuzzle(generate_template_board(3, True)))
+    with pytest.raises(RuntimeError, match="exited with code"):
+        hda_star(
+            State(NPuzzle(generate_template_board(3))),
+            goal,
+            BrokenHeuristic(3, goal.board),
+            workers=2,
+        )
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from n2_puzzle.peephole import cancel_inverses, optimize_plan
+from n2_puzzle.puzzle import Direction, NPuzzle
+from n2_puzzle.scramble import random_boards
+from n2_puzzle.solver import solve_puzzle
+
+
+@pytest.fixture(scope="module", autouse=True)
+def data_dir(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("N2_PUZZLE_DATA", str(tmp_path_factory.mktemp("data")))
+        yield
+
+
+def random_walk(board, length, rng):
+    """Plan of `length` random moves that stay inside the board"""
+    puzzle = NPuzzle(board)
+    plan = []
+    while len(plan) < length:
+        action = rng.choice(list(Direction))
+        if puzzle.move(action):
+            plan.append(action)
+    return plan
+
+
+def check(board, plan):
+    puzzle = NPuzzle(board)
+    n = puzzle.n
+    optimized = optimize_plan(plan, n, puzzle.positions[0])
+    assert len(optimized) <= len(plan)
+    expected = NPuzzle(board)
+    for action in plan:
+        expected.move(action)
+    assert all(puzzle.move(action) for action in optimized)
+    assert puzzle == expected
+    return optimized
+
+
+def test_cancel_inverses():
+    plan = [Direction.UP, Direction.LEFT, Direction.RIGHT, Direction.DOWN]
+    assert cancel_inverses(plan) == []
+    plan = [Direction.UP, Direction.LEFT, Direction.UP, Direction.DOWN]
+    assert cancel_inverses(plan) == [Direction.UP, Direction.LEFT]
+
+
+@pytest.mark.parametrize("n", [2, 3, 4, 6])
+def test_random_walks(n):
+    rng = random.Random(n)
+    for board in random_boards(n, 20, seed=n):
+        check(board, random_walk(board, 200, rng))
+
+
+@pytest.mark.parametrize("n", [4, 5, 8])
+def test_greedy_plans(n):
+    for board in random_boards(n, 3, seed=n):
+        plan = solve_puzzle(NPuzzle(board), optimize=False)
+        assert len(check(board, plan)) < len(plan)
@@ -0,0 +1,21 @@
+import pytest
+
+from n2_puzzle.puzzle import Direction, NPuzzle
+from n2_puzzle.search import State, a_star_puzzle
+
+
+def test_tiles_can_have_any_label():
+    puzzle = NPuzzle([[13, 14, 15], [18, 19, 20], [23, 0, 24]])
+    assert puzzle.tile_pos[0] == (2, 1)
+    assert puzzle.tile_pos[24] == (2, 2)
+    assert sorted(puzzle.tile_pos) == [0, 13, 14, 15, 18, 19, 20, 23, 24]
+    with pytest.raises(KeyError):
+        puzzle.tile_pos[16]
+    assert puzzle.move(Direction.RIGHT)
+    assert puzzle.board == [[13, 14, 15], [18, 19, 20], [23, 24, 0]]
+
+
+def test_search_on_a_sub_board():
+    board = NPuzzle([[13, 14, 15], [18, 19, 20], [23, 0, 24]])
+    goal = NPuzzle([[13, 14, 15], [18, 19, 20], [23, 24, 0]])
+    assert a_star_puzzle(State(board), State(goal)) == [Direction.RIGHT]
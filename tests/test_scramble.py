@@ -0,0 +1,73 @@
+from collections import deque
+from itertools import permutations
+
+import pytest
+
+from n2_puzzle.puzzle import generate_template_board
+from n2_puzzle.scramble import is_solvable, random_boards, random_boards_array
+from n2_puzzle.search import blank_moves
+
+
+def reachable_boards(n, depth=None):
+    """Boards the goal reaches in at most `depth` moves, all if None"""
+    goal = bytes(tile for row in generate_template_board(n, True) for tile in row)
+    moves = blank_moves(n)
+    seen = {goal}
+    queue = deque([(goal, 0)])
+    while queue:
+        board, moved = queue.popleft()
+        if moved == depth:
+            continue
+        blank = board.index(0)
+        for _, pos in moves[blank]:
+            child = bytearray(board)
+            child[blank], child[pos] = child[pos], 0
+            child = bytes(child)
+            if child not in seen:
+                seen.add(child)
+                queue.append((child, moved + 1))
+    return seen
+
+
+def rows(board, n):
+    return [list(board[i * n : (i + 1) * n]) for i in range(n)]
+
+
+@pytest.mark.parametrize("n", [2, 3])
+def test_is_solvable_matches_bfs(n):
+    reachable = reachable_boards(n)
+    for board in permutations(range(n * n)):
+        assert is_solvable(rows(board, n)) == (bytes(board) in reachable)
+
+
+def test_is_solvable_matches_bfs_near_the_4x4_goal():
+    for board in reachable_boards(4, depth=12):
+        assert is_solvable(rows(board, 4))
+        # Swapping two tiles flips the parity without moving the blank
+        swapped = bytearray(board)
+        first, second = [pos for pos in range(3) if board[pos]][:2]
+        swapped[first], swapped[second] = board[second], board[first]
+        assert not is_solvable(rows(swapped, 4))
+
+
+@pytest.mark.parametrize("n", [3, 4, 5])
+def test_random_boards_are_solvable_and_seeded(n):
+    boards = list(random_boards(n, 50, seed=1))
+    assert boards == list(random_boards(n, 50, seed=1))
+    for board in boards:
+        assert sorted(tile for row in board for tile in row) == list(range(n * n))
+        assert is_solvable(board)
+
+
+@pytest.mark.parametrize("n", [2, 3, 4])
+def test_random_boards_array_are_solvable(n):
+    pytest.importorskip("numpy")
+    reachable = reachable_boards(n) if n < 4 else None
+    batches = list(random_boards_array(n, 500, seed=1, batch_size=128))
+    assert [len(batch) for batch in batches] == [128, 128, 128, 116]
+    for batch in batches:
+        for board in batch.tolist():
+            assert sorted(board) == list(range(n * n))
+            assert is_solvable(rows(board, n))
+            if reachable is not None:
+                assert bytes(board) in reachable
@@ -0,0 +1,86 @@
+from functools import partial
+
+import pytest
+
+from n2_puzzle.endgame import EndgameTable
+from n2_puzzle.parallel import hda_star
+from n2_puzzle.puzzle import NPuzzle, generate_template_board
+from n2_puzzle.search import (
+    State,
+    a_star_puzzle,
+    anytime_a_star,
+    bidirectional_search,
+    ida_star_puzzle,
+    memory_bounded_a_star,
+)
+
+GOAL = generate_template_board(3, is_goal=True)
+
+BOARDS = [
+    [[1, 2, 3], [4, 5, 6], [7, 8, 0]],
+    [[1, 2, 3], [4, 0, 6], [7, 5, 8]],
+    [[4, 1, 3], [7, 2, 6], [0, 5, 8]],
+    [[8, 6, 7], [2, 5, 4], [3, 0, 1]],
+    generate_template_board(3),
+]
+
+ENGINES = {
+    "a-star": a_star_puzzle,
+    "buckets": partial(a_star_puzzle, buckets=True),
+    "bidirectional": partial(a_star_puzzle, bidirectional=True),
+    "ida-star": ida_star_puzzle,
+    "anytime": partial(anytime_a_star, epsilon=1.0),
+    "sma-star": partial(memory_bounded_a_star, max_nodes=1_000_000),
+    "hda-star": partial(hda_star, workers=2),
+}
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("N2_PUZZLE_DATA", str(tmp_path_factory.mktemp("data")))
+        yield EndgameTable.load()
+
+
+def solves(board, plan):
+    puzzle = NPuzzle(board)
+    return all(puzzle.move(action) for action in plan) and puzzle.board == GOAL
+
+
+@pytest.mark.parametrize("board", BOARDS)
+@pytest.mark.parametrize("engine", ENGINES)
+def test_plan_is_optimal(table, engine, board):
+    plan = ENGINES[engine](State(NPuzzle(board)), State(NPuzzle(GOAL)))
+    packed = bytes(tile for row in board for tile in row)
+    assert len(plan) == table.distance(packed)
+    assert solves(board, plan)
+
+
+@pytest.mark.parametrize("heuristic", ["manhattan", "linear-conflict"])
+def test_batch_size_takes_a_heuristic_name(table, heuristic):
+    pytest.importorskip("numpy")
+    board = BOARDS[3]
+    plan = a_star_puzzle(
+        State(NPuzzle(board)), State(NPuzzle(GOAL)), heuristic, batch_size=16
+    )
+    packed = bytes(tile for row in board for tile in row)
+    assert len(plan) == table.distance(packed)
+    assert solves(board, plan)
+
+
+def test_memory_bounded_gives_up_when_the_plan_does_not_fit():
+    board = generate_template_board(3)
+    plan = memory_bounded_a_star(
+        State(NPuzzle(board)), State(NPuzzle(GOAL)), max_nodes=12
+    )
+    assert plan == []
+
+
+@pytest.mark.parametrize("heuristic", ["linear-conflict", "pdb"])
+def test_heuristic_names(table, heuristic):
+    board = BOARDS[3]
+    packed = bytes(tile for row in board for tile in row)
+    for engine in (a_star_puzzle, bidirectional_search):
+        plan = engine(State(NPuzzle(board)), State(NPuzzle(GOAL)), heuristic)
+        assert len(plan) == table.distance(packed)
+        assert solves(board, plan)
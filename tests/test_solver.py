@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+from n2_puzzle.endgame import EndgameTable
+from n2_puzzle.puzzle import NPuzzle, generate_template_board
+from n2_puzzle.scramble import random_boards
+from n2_puzzle.search import State, anytime_a_star
+from n2_puzzle.solver import solve_puzzle
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("N2_PUZZLE_DATA", str(tmp_path_factory.mktemp("data")))
+        yield EndgameTable.load()
+
+
+def test_time_budget_bounds_the_endgame(table):
+    board = next(random_boards(6, 1, seed=5))
+    start = time.perf_counter()
+    plan = solve_puzzle(NPuzzle(board), endgame=5, epsilon=1.0, time_budget=1.0)
+    assert time.perf_counter() - start < 2.0
+    puzzle = NPuzzle(board)
+    assert all(puzzle.move(action) for action in plan)
+    assert puzzle.board == generate_template_board(6, True)
+
+
+def test_time_budget_proves_small_plans_optimal(table):
+    board = [[8, 6, 7], [2, 5, 4], [3, 0, 1]]
+    goal = generate_template_board(3, True)
+    plan = anytime_a_star(
+        State(NPuzzle(board)), State(NPuzzle(goal)), epsilon=3.0, time_budget=10.0
+    )
+    packed = bytes(tile for row in board for tile in row)
+    assert len(plan) == table.distance(packed)
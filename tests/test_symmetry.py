@@ -0,0 +1,71 @@
+import pytest
+
+from n2_puzzle.cache import PlanCache
+from n2_puzzle.puzzle import NPuzzle, generate_template_board
+from n2_puzzle.scramble import random_boards
+from n2_puzzle.search import State, a_star_puzzle
+from n2_puzzle.symmetry import canonical_board, transpose_board, transpose_plan
+
+
+def flat(board):
+    return [tile for row in board for tile in row]
+
+
+def rows(tiles, n):
+    return [list(tiles[i * n : (i + 1) * n]) for i in range(n)]
+
+
+def reaches(board, plan, goal):
+    puzzle = NPuzzle(board)
+    return all(puzzle.move(action) for action in plan) and puzzle.board == goal
+
+
+@pytest.mark.parametrize("n", [2, 3, 4, 5])
+def test_transpose_board(n):
+    goal = flat(generate_template_board(n, True))
+    assert transpose_board(goal, n) == goal
+    assert transpose_board(bytes(goal), n) == bytes(goal)
+    for board in random_boards(n, 20, seed=n):
+        tiles = flat(board)
+        transposed = transpose_board(tiles, n)
+        assert sorted(transposed) == sorted(tiles)
+        assert transpose_board(transposed, n) == tiles
+        assert transpose_board(bytes(tiles), n) == bytes(transposed)
+
+
+def test_transposed_plans_solve_transposed_boards():
+    goal = generate_template_board(3, True)
+    for board in random_boards(3, 10, seed=3):
+        plan = a_star_puzzle(State(NPuzzle(board)), State(NPuzzle(goal)))
+        transposed = rows(transpose_board(flat(board), 3), 3)
+        assert reaches(transposed, transpose_plan(plan), goal)
+
+
+@pytest.mark.parametrize("n", [3, 4])
+def test_canonical_board(n):
+    for board in random_boards(n, 20, seed=n):
+        tiles = flat(board)
+        transposed = transpose_board(tiles, n)
+        canonical, flipped = canonical_board(tiles, n)
+        assert canonical == min(tiles, transposed)
+        assert canonical == (transposed if flipped else tiles)
+        assert canonical_board(transposed, n)[0] == canonical
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_plan_cache_shares_transposed_boards(tmp_path, on_disk):
+    goal = generate_template_board(3, True)
+    path = str(tmp_path / "plans.sqlite") if on_disk else None
+    for board in random_boards(3, 5, seed=4):
+        transposed = rows(transpose_board(flat(board), 3), 3)
+        plan = a_star_puzzle(State(NPuzzle(board)), State(NPuzzle(goal)))
+        with PlanCache(path) as cache:
+            cache.put("test", flat(board), flat(goal), plan)
+            if on_disk:
+                cache.memory.clear()
+            assert cache.get("test", flat(board), flat(goal)) == plan
+            cached = cache.get("test", flat(transposed), flat(goal))
+            assert cached == transpose_plan(plan)
+            assert reaches(transposed, cached, goal)
+            assert cache.stats.hits == 2
+            cache.clear()